@@ -0,0 +1,300 @@
+# src/benchmarks/pipeline.py
+"""
+Benchmarks du pipeline de données, avec comparaison à une référence.
+
+Mesure les chemins critiques (process_font, process_glyph,
+process_font_to_tensor, débit du DataLoader, chargement depuis un volume lent
+simulé) sur le corpus d'entraînement et sur des corpus synthétiques agrandis
+(polices dupliquées), et enregistre pour chaque mesure les temps et le pic
+d'allocations Python. Le pic de RSS, propre au processus et jamais réinitialisé,
+n'est enregistré qu'une fois pour toute l'exécution.
+
+Usage :
+    python -m src.benchmarks.pipeline --output benchmarks/current.json
+    python -m src.benchmarks.pipeline --baseline benchmarks/baseline.json --tolerance 0.15
+    python -m src.benchmarks.pipeline --read-mbps 20 --read-latency-ms 50  # volume réseau plus lent
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import resource
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+import numpy as np
+import torch
+from functools import partial
+from pathlib import Path
+from typing import Dict, Any, Callable, List, Optional
+
+from torch.utils.data import DataLoader
+
+from src.data.datasets.glyph_dataset import GlyphDataset, collate_glyphs
+from src.data.prefetch import FontPrefetcher, throttled_reader
+from src.data.processors.charset import Charset
+from src.data.processors.font_processor import FontProcessor
+from src.data.processors.glyph_processor import GlyphProcessor
+from src.data.processors.tensor_processor import TensorProcessor
+
+# Clés comparées à la référence : temps (plus bas = mieux) et débits (plus haut = mieux)
+LOWER_IS_BETTER = ('mean_s', 'peak_alloc_mb')
+HIGHER_IS_BETTER = ('glyphs_per_s', 'fonts_per_s')
+
+
+def _peak_rss_mb() -> float:
+    """Pic de mémoire résidente du processus (ru_maxrss est en Ko sous Linux, en octets sous macOS)"""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+
+
+class Benchmark:
+    """
+    Exécute des fonctions chronométrées et collecte leurs résultats.
+
+    Chaque mesure est précédée d'un passage d'échauffement, répétée `repeats`
+    fois pour le temps, puis rejouée une fois sous tracemalloc pour le pic
+    d'allocations (séparément, car tracemalloc ralentit fortement l'exécution).
+    """
+
+    def __init__(self, repeats: int = 5, quiet: bool = True):
+        self.repeats = repeats
+        self.quiet = quiet
+        self.results: Dict[str, Dict[str, Any]] = {}
+
+    def _call(self, fn: Callable[[], Any]) -> Any:
+        # Masque les éventuelles sorties des fonctions mesurées
+        if not self.quiet:
+            return fn()
+        with contextlib.redirect_stdout(io.StringIO()):
+            return fn()
+
+    def run(self, name: str, fn: Callable[[], Any], items: Optional[Dict[str, int]] = None) -> Dict[str, Any]:
+        """
+        Args:
+            name: Nom de la mesure
+            fn: Fonction sans argument à chronométrer
+            items: Quantités traitées par appel (ex. {'glyphs': 300}), converties en débits
+
+        Returns:
+            Résultat de la mesure (aussi stocké dans self.results)
+        """
+        self._call(fn)
+
+        timings = []
+        for _ in range(self.repeats):
+            start = time.perf_counter()
+            self._call(fn)
+            timings.append(time.perf_counter() - start)
+
+        tracemalloc.start()
+        self._call(fn)
+        _, peak_alloc = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+        result = {
+            'mean_s': statistics.mean(timings),
+            'min_s': min(timings),
+            'std_s': statistics.pstdev(timings),
+            'repeats': self.repeats,
+            'peak_alloc_mb': peak_alloc / (1024 * 1024),
+        }
+        for unit, count in (items or {}).items():
+            result[f"{unit}_per_s"] = count / result['mean_s']
+        self.results[name] = result
+        print(f"{name:<45} {result['mean_s'] * 1000:10.2f} ms  "
+              f"(min {result['min_s'] * 1000:.2f}, alloc {result['peak_alloc_mb']:.1f} Mo)")
+        return result
+
+
+def make_synthetic_corpus(font_paths: List[Path], factor: int, output_dir: Path) -> List[Path]:
+    """
+    Corpus agrandi `factor` fois par duplication des polices.
+
+    Les copies ont des noms distincts pour que chaque fichier soit traité
+    comme une police à part entière.
+    """
+    output_dir.mkdir(parents=True, exist_ok=True)
+    copies = []
+    for i in range(factor):
+        for font_path in font_paths:
+            copy = output_dir / f"{font_path.stem}-{i:04d}{font_path.suffix}"
+            if not copy.exists():
+                try:
+                    os.link(font_path, copy)
+                except OSError:
+                    shutil.copyfile(font_path, copy)
+            copies.append(copy)
+    return copies
+
+
+def bench_processors(bench: Benchmark, font_paths: List[Path]) -> None:
+    """Temps par police de FontProcessor, GlyphProcessor et TensorProcessor (tous glyphes et charset)"""
+    font_processor = FontProcessor()
+    glyph_processor = GlyphProcessor()
+    tensor_processor = TensorProcessor()
+    charset_processor = TensorProcessor(charset=Charset.from_config('latin-basic'))
+
+    for font_path in font_paths:
+        font_data = font_processor.process_font(font_path)
+        glyph_set = font_data['glyph_set']
+        names = list(font_data['font'].getGlyphOrder())
+
+        bench.run(f"process_font[{font_path.stem}]",
+                  lambda: font_processor.process_font(font_path), {'fonts': 1})
+        bench.run(f"process_font_metadata_only[{font_path.stem}]",
+                  lambda: font_processor.process_font(font_path, metadata_only=True), {'fonts': 1})
+        bench.run(f"process_glyph[{font_path.stem}]",
+                  lambda: [glyph_processor.process_glyph(glyph_set[name]) for name in names],
+                  {'glyphs': len(names)})
+        bench.run(f"process_font_glyphs[{font_path.stem}]",
+                  lambda: glyph_processor.process_font_glyphs(glyph_set, names), {'glyphs': len(names)})
+
+        num_glyphs = len(bench._call(lambda: tensor_processor.process_font_to_tensor(font_data))['glyph_lengths'])
+        bench.run(f"process_font_to_tensor[{font_path.stem}]",
+                  lambda: tensor_processor.process_font_to_tensor(font_processor.process_font(font_path)),
+                  {'fonts': 1, 'glyphs': num_glyphs})
+        bench.run(f"process_font_to_tensor_latin_basic[{font_path.stem}]",
+                  lambda: charset_processor.process_font_to_tensor(font_processor.process_font(font_path)),
+                  {'fonts': 1, 'glyphs': len(charset_processor.charset)})
+
+
+def bench_dataloader(bench: Benchmark, name: str, font_paths: List[Path], batch_size: int,
+                     num_workers: int) -> None:
+    """
+    Débit de bout en bout du DataLoader (traitement des polices compris, sans cache).
+
+    Avec des workers, les allocations mesurées sont celles du processus
+    principal uniquement.
+    """
+    dataset = GlyphDataset(font_paths)
+    loader = DataLoader(dataset, batch_size=batch_size, num_workers=num_workers,
+                        collate_fn=partial(collate_glyphs, pad_multiple=8))
+
+    counts = {'glyphs': 0}
+
+    def consume():
+        glyphs = 0
+        for batch in loader:
+            glyphs += len(batch['lengths'])
+        counts['glyphs'] = glyphs
+
+    # Un passage pour compter les glyphes, nécessaire au calcul du débit
+    bench._call(consume)
+    bench.run(name, consume, {'glyphs': counts['glyphs'], 'fonts': len(font_paths)})
+
+
+def bench_prefetch(bench: Benchmark, name: str, font_paths: List[Path], megabytes_per_second: float,
+                   latency_ms: float, max_concurrency: int = 8) -> None:
+    """
+    Chargement des polices depuis un volume lent simulé : lecture puis analyse
+    séquentielles, contre lecture anticipée recouvrant l'analyse.
+    """
+    font_processor = FontProcessor()
+    reader = throttled_reader(megabytes_per_second, latency_ms)
+
+    def sequential():
+        for font_path in font_paths:
+            font_processor.process_font(font_path, data=reader(font_path))
+
+    def prefetched():
+        for font_path, data in FontPrefetcher(font_paths, max_concurrency, reader=reader):
+            font_processor.process_font(font_path, data=data)
+
+    bench.run(f"{name}[sequential]", sequential, {'fonts': len(font_paths)})
+    bench.run(f"{name}[prefetch={max_concurrency}]", prefetched, {'fonts': len(font_paths)})
+
+
+def compare(results: Dict[str, Dict[str, Any]], baseline: Dict[str, Dict[str, Any]],
+            tolerance: float) -> List[str]:
+    """
+    Compare des résultats à une référence.
+
+    Returns:
+        Liste des régressions dépassant `tolerance` (ex. 0.1 pour 10 %)
+    """
+    regressions = []
+    for name, result in results.items():
+        reference = baseline.get(name)
+        if reference is None:
+            continue
+        for key in LOWER_IS_BETTER + HIGHER_IS_BETTER:
+            if key not in result or not reference.get(key):
+                continue
+            change = result[key] / reference[key] - 1.0
+            if key in HIGHER_IS_BETTER:
+                change = -change
+            marker = 'RÉGRESSION' if change > tolerance else ('gain' if change < -tolerance else '')
+            print(f"{name:<45} {key:<14} {reference[key]:12.4f} -> {result[key]:12.4f} "
+                  f"({change * 100:+.1f} %) {marker}")
+            if change > tolerance:
+                regressions.append(f"{name}.{key}")
+    return regressions
+
+
+def environment() -> Dict[str, Any]:
+    return {
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count(),
+        'numpy': np.__version__,
+        'torch': torch.__version__,
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+    }
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Benchmarks du pipeline de données")
+    parser.add_argument('--font-dir', type=Path, default=Path('data/fonts/train'))
+    parser.add_argument('--scales', type=int, nargs='+', default=[1, 8],
+                        help="Facteurs d'agrandissement des corpus synthétiques pour le DataLoader")
+    parser.add_argument('--repeats', type=int, default=5)
+    parser.add_argument('--batch-size', type=int, default=32)
+    parser.add_argument('--workers', type=int, nargs='+', default=[0, 2])
+    parser.add_argument('--read-mbps', type=float, default=50.0, help="Débit du volume lent simulé (Mo/s)")
+    parser.add_argument('--read-latency-ms', type=float, default=20.0, help="Latence par fichier du volume lent simulé")
+    parser.add_argument('--output', type=Path, default=None, help="Fichier JSON des résultats")
+    parser.add_argument('--baseline', type=Path, default=None, help="Résultats de référence à comparer")
+    parser.add_argument('--tolerance', type=float, default=0.1, help="Écart relatif toléré avant régression")
+    args = parser.parse_args(argv)
+
+    font_paths = sorted(p for p in args.font_dir.rglob("*") if p.suffix.lower() == '.ttf')
+    if not font_paths:
+        raise SystemExit(f"Aucune police dans {args.font_dir}")
+
+    bench = Benchmark(repeats=args.repeats)
+    bench_processors(bench, font_paths)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        for scale in args.scales:
+            corpus = font_paths if scale == 1 else make_synthetic_corpus(font_paths, scale, Path(tmp) / f"x{scale}")
+            for num_workers in args.workers:
+                bench_dataloader(bench, f"dataloader[x{scale},workers={num_workers}]",
+                                 corpus, args.batch_size, num_workers)
+            bench_prefetch(bench, f"load_slow_volume[x{scale}]", corpus, args.read_mbps, args.read_latency_ms)
+
+    report = {'environment': environment(), 'peak_rss_mb': _peak_rss_mb(), 'results': bench.results}
+    print(f"Pic de RSS du processus sur toute l'exécution : {report['peak_rss_mb']:.0f} Mo")
+    if args.output:
+        args.output.parent.mkdir(parents=True, exist_ok=True)
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"Résultats enregistrés dans {args.output}")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)['results']
+        regressions = compare(bench.results, baseline, args.tolerance)
+        if regressions:
+            print(f"{len(regressions)} régression(s) au-delà de {args.tolerance * 100:.0f} % : {', '.join(regressions)}")
+            sys.exit(1)
+        print("Aucune régression")
+
+
+if __name__ == "__main__":
+    main()
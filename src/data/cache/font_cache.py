@@ -0,0 +1,222 @@
+# src/data/cache/font_cache.py
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import numpy as np
+import torch
+from pathlib import Path
+from typing import Dict, Any, Optional
+
+from src.data.processors.charset import Charset
+from src.data.processors.tensor_processor import PROCESSOR_VERSION
+
+class FontCache:
+    """
+    Cache disque des polices traitées, indexé par le hash du contenu du fichier.
+
+    Chaque entrée est un dossier contenant les tableaux en `.npy` (rechargés en
+    memory-map) et un `info.json` avec les métadonnées, axes et instances.
+    Les entrées les moins récemment utilisées sont supprimées au-delà du budget.
+
+    La taille du cache est suivie par un compteur approché (initialisé par un
+    parcours du dossier, puis augmenté à chaque écriture) : le dossier n'est
+    reparcouru que lorsque le compteur dépasse le budget, et l'éviction
+    descend alors à EVICT_TARGET du budget pour espacer les parcours. Chaque
+    processus a son propre compteur, qui ignore les écritures des autres
+    jusqu'à son prochain parcours : le budget peut être dépassé
+    temporairement.
+    """
+
+    ARRAYS = ('glyphs', 'glyph_lengths', 'glyph_present', 'font_stats', 'variations')
+    # Fraction du budget visée par une éviction
+    EVICT_TARGET = 0.9
+
+    def __init__(self, cache_dir: Path, max_size_mb: Optional[float] = None, charset: Optional[Charset] = None):
+        """
+        Args:
+            cache_dir: Dossier du cache
+            max_size_mb: Budget disque au-delà duquel les entrées sont évincées
+            charset: Charset du TensorProcessor utilisé, qui fait partie de la clé
+        """
+        self.cache_dir = Path(cache_dir)
+        self.charset = charset
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self.max_size_bytes = int(max_size_mb * 1024 * 1024) if max_size_mb else None
+        # Taille estimée du cache en octets, None tant que le dossier n'a pas été parcouru
+        self._size: Optional[int] = None
+
+    @staticmethod
+    def hash_file(font_path: Path) -> str:
+        """Hash SHA-256 du contenu du fichier, lu par blocs"""
+        digest = hashlib.sha256()
+        with open(font_path, 'rb') as f:
+            for chunk in iter(lambda: f.read(1 << 20), b''):
+                digest.update(chunk)
+        return digest.hexdigest()
+
+    def key(self, font_path: Path, data: Optional[bytes] = None) -> str:
+        """Clé d'une police : hash du contenu (déjà lu si `data` est fourni) + version du processeur + charset"""
+        digest = hashlib.sha256(data).hexdigest() if data is not None else self.hash_file(font_path)
+        key = f"{digest}-v{PROCESSOR_VERSION}"
+        return f"{key}-{self.charset.key}" if self.charset is not None else key
+
+    def get(self, font_path: Path, key: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        """
+        Charge une entrée du cache.
+
+        Args:
+            font_path: Chemin de la police
+            key: Clé déjà calculée, pour éviter de re-hasher le fichier
+
+        Returns:
+            Dict au format de process_font + process_font_to_tensor (sans `font`
+            ni `glyph_set`), ou None si la police n'est pas en cache
+        """
+        entry = self.cache_dir / (key or self.key(font_path))
+        info_path = entry / 'info.json'
+        if not info_path.exists():
+            return None
+
+        with open(info_path) as f:
+            result = json.load(f)
+        for name in self.ARRAYS:
+            # mmap en copy-on-write : rien n'est lu tant qu'on ne touche pas aux données
+            result[name] = torch.from_numpy(np.load(entry / f"{name}.npy", mmap_mode='c'))
+        result['glyph_mask'] = self._create_glyph_mask(result['glyphs'], result['glyph_lengths'])
+
+        # Marque l'entrée comme récemment utilisée pour l'éviction LRU
+        os.utime(info_path)
+        return result
+
+    def put(self, font_path: Path, font_data: Dict, tensor_data: Dict, key: Optional[str] = None) -> None:
+        """
+        Enregistre une police traitée dans le cache.
+
+        Args:
+            font_path: Chemin de la police
+            font_data: Données depuis FontProcessor
+            tensor_data: Tenseurs depuis TensorProcessor
+            key: Clé déjà calculée, pour éviter de re-hasher le fichier
+        """
+        entry = self.cache_dir / (key or self.key(font_path))
+        if entry.exists():
+            return
+
+        # Écriture dans un dossier temporaire puis renommage atomique
+        tmp_dir = Path(tempfile.mkdtemp(dir=self.cache_dir, prefix='.tmp-'))
+        try:
+            for name in self.ARRAYS:
+                np.save(tmp_dir / f"{name}.npy", tensor_data[name].numpy())
+            with open(tmp_dir / 'info.json', 'w') as f:
+                json.dump({
+                    'metadata': font_data['metadata'],
+                    'variation_axes': font_data['variation_axes'],
+                    'instances': font_data['instances'],
+                }, f)
+            entry_size = sum(f.stat().st_size for f in tmp_dir.iterdir())
+            os.replace(tmp_dir, entry)
+        except OSError:
+            # Une autre écriture concurrente a pu créer l'entrée entre-temps
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+            if not entry.exists():
+                raise
+            return
+
+        if self.max_size_bytes is None:
+            return
+        if self._size is None or self._size + entry_size > self.max_size_bytes:
+            self.evict()
+        else:
+            self._size += entry_size
+
+    def load_or_process(self, font_path: Path, font_processor, tensor_processor,
+                        data: Optional[bytes] = None) -> Dict[str, Any]:
+        """
+        Renvoie les données traitées d'une police, depuis le cache si possible.
+
+        En cas d'absence, la police est traitée par FontProcessor et
+        TensorProcessor puis enregistrée. Avec `data` (octets déjà lus), le
+        fichier n'est pas relu pour le hash ni pour l'analyse.
+        """
+        key = self.key(font_path, data)
+        result = self.get(font_path, key)
+
+        if result is None:
+            font_data = font_processor.process_font(font_path, data=data)
+            tensor_data = tensor_processor.process_font_to_tensor(font_data)
+            self.put(font_path, font_data, tensor_data, key)
+            result = self.get(font_path, key)
+            if result is None:
+                # Entrée évincée aussitôt écrite (police plus grosse que le budget,
+                # ou éviction concurrente) : même format, depuis la mémoire
+                result = {name: font_data[name] for name in ('metadata', 'variation_axes', 'instances')}
+                result.update({name: tensor_data[name] for name in self.ARRAYS})
+                result['glyph_mask'] = tensor_data['glyph_mask']
+
+        result['description'] = font_processor._get_font_description(font_path.name)
+        result['style_embedding'] = tensor_processor._create_style_embedding(result['description'])
+        return result
+
+    def _create_glyph_mask(self, glyphs: torch.Tensor, lengths: torch.Tensor) -> torch.Tensor:
+        """Masque des points réels, recalculé plutôt que stocké"""
+        if glyphs.dim() < 3:
+            return torch.zeros((0, 0), dtype=torch.bool)
+        return torch.arange(glyphs.shape[1]).unsqueeze(0) < lengths.unsqueeze(1)
+
+    def size(self) -> int:
+        """Taille totale du cache en octets"""
+        return sum(f.stat().st_size for f in self.cache_dir.rglob('*') if f.is_file())
+
+    def evict(self) -> None:
+        """
+        Parcourt le cache et, s'il dépasse le budget, supprime les entrées les
+        moins récemment utilisées jusqu'à EVICT_TARGET du budget.
+        """
+        if self.max_size_bytes is None:
+            return
+
+        entries = []
+        total = 0
+        for entry in self.cache_dir.iterdir():
+            info_path = entry / 'info.json'
+            if entry.name.startswith('.') or not info_path.exists():
+                continue
+            entry_size = sum(f.stat().st_size for f in entry.iterdir())
+            entries.append((info_path.stat().st_mtime, entry_size, entry))
+            total += entry_size
+
+        if total > self.max_size_bytes:
+            target = self.max_size_bytes * self.EVICT_TARGET
+            for _, entry_size, entry in sorted(entries):
+                if total <= target:
+                    break
+                shutil.rmtree(entry, ignore_errors=True)
+                total -= entry_size
+        self._size = total
+
+
+if __name__ == "__main__":
+    # Test du cache
+    import time
+    import yaml
+    from src.data.processors.font_processor import FontProcessor
+    from src.data.processors.tensor_processor import TensorProcessor
+
+    with open('configs/data/default.yaml') as f:
+        config = yaml.safe_load(f)['data']
+
+    charset = Charset.from_config(config.get('charset'))
+    cache = FontCache(Path(config['cache_dir']), config.get('cache_max_size_mb'), charset)
+    font_processor = FontProcessor()
+    tensor_processor = TensorProcessor(charset=charset)
+
+    for font_path in sorted(Path(config['train_dir']).glob("*.ttf")):
+        for attempt in ('froid', 'chaud'):
+            start = time.perf_counter()
+            result = cache.load_or_process(font_path, font_processor, tensor_processor)
+            elapsed = time.perf_counter() - start
+            print(f"{font_path.name} ({attempt}): {tuple(result['glyphs'].shape)} en {elapsed * 1000:.1f} ms")
+
+    print(f"\nTaille du cache : {cache.size() / 1024:.1f} Ko")
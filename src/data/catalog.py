@@ -0,0 +1,274 @@
+# src/data/catalog.py
+"""
+Catalogue SQLite du corpus de polices, mis à jour incrémentalement.
+
+Usage :
+    python -m src.data.catalog --config configs/data/default.yaml
+"""
+import argparse
+import json
+import logging
+import sqlite3
+import yaml
+from pathlib import Path
+from typing import Dict, Any, Iterable, List, Optional
+
+from src.data.cache.font_cache import FontCache
+from src.data.instrumentation import get_instrumentation
+from src.data.processors.font_processor import FontProcessor
+
+logger = logging.getLogger(__name__)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS fonts (
+    path TEXT PRIMARY KEY,
+    hash TEXT NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    size INTEGER NOT NULL,
+    name TEXT,
+    version REAL,
+    units_per_em INTEGER,
+    ascent INTEGER,
+    descent INTEGER,
+    x_height INTEGER,
+    cap_height INTEGER,
+    is_variable INTEGER,
+    num_glyphs INTEGER,
+    max_points INTEGER,
+    description TEXT
+);
+CREATE TABLE IF NOT EXISTS axes (
+    path TEXT NOT NULL REFERENCES fonts(path) ON DELETE CASCADE,
+    tag TEXT NOT NULL,
+    min_value REAL,
+    default_value REAL,
+    max_value REAL
+);
+CREATE TABLE IF NOT EXISTS instances (
+    path TEXT NOT NULL REFERENCES fonts(path) ON DELETE CASCADE,
+    name TEXT,
+    coordinates TEXT
+);
+CREATE TABLE IF NOT EXISTS tags (
+    path TEXT NOT NULL REFERENCES fonts(path) ON DELETE CASCADE,
+    tag TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_axes_tag ON axes(tag, path);
+CREATE INDEX IF NOT EXISTS idx_tags_tag ON tags(tag, path);
+CREATE INDEX IF NOT EXISTS idx_fonts_max_points ON fonts(max_points);
+CREATE INDEX IF NOT EXISTS idx_fonts_hash ON fonts(hash);
+"""
+
+METADATA_FIELDS = ('name', 'version', 'units_per_em', 'ascent', 'descent', 'x_height', 'cap_height', 'is_variable')
+
+class FontCatalog:
+    """
+    Index des polices du corpus : métadonnées, axes, instances, nombre de
+    glyphes, nombre maximum de points et tags des descriptions.
+
+    Les polices ne sont relues que si leur taille ou mtime a changé, et
+    réextraites seulement si leur hash de contenu a changé. Les écritures de
+    chaque police sont atomiques (un savepoint par police) : une police en
+    échec garde ses lignes précédentes.
+    """
+
+    def __init__(self, db_path: Path, font_processor: Optional[FontProcessor] = None):
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self.connection = sqlite3.connect(self.db_path)
+        self.connection.execute("PRAGMA foreign_keys = ON")
+        self.connection.executescript(SCHEMA)
+        self.font_processor = font_processor or FontProcessor()
+
+    def close(self) -> None:
+        self.connection.close()
+
+    def update(self, font_paths: Iterable[Path], prune: bool = True) -> Dict[str, int]:
+        """
+        Met à jour le catalogue pour une liste de polices.
+
+        Args:
+            font_paths: Polices du corpus
+            prune: Supprime les polices cataloguées qui ne sont plus dans la liste
+
+        Returns:
+            Compteurs des polices ajoutées, mises à jour, inchangées, supprimées et en échec
+        """
+        stats = {'added': 0, 'updated': 0, 'unchanged': 0, 'removed': 0, 'failed': 0}
+        known = {
+            row[0]: row[1:]
+            for row in self.connection.execute("SELECT path, hash, mtime_ns, size, description FROM fonts")
+        }
+        seen = set()
+
+        with self.connection:
+            for font_path in font_paths:
+                path = str(font_path)
+                seen.add(path)
+                self.connection.execute("SAVEPOINT font")
+                try:
+                    self._update_font(Path(font_path), known.get(path), stats)
+                except Exception as e:
+                    # Annule les DELETE/INSERT partiels de cette police seulement
+                    self.connection.execute("ROLLBACK TO font")
+                    get_instrumentation().failure('catalog.fonts', path, e)
+                    logger.warning("Erreur avec la police %s: %s", path, e)
+                    stats['failed'] += 1
+                finally:
+                    self.connection.execute("RELEASE font")
+
+            if prune:
+                for path in set(known) - seen:
+                    self.connection.execute("DELETE FROM fonts WHERE path = ?", (path,))
+                    stats['removed'] += 1
+
+        return stats
+
+    def _update_font(self, font_path: Path, row: Optional[tuple], stats: Dict[str, int]) -> None:
+        stat = font_path.stat()
+        path = str(font_path)
+        description = self.font_processor._get_font_description(font_path.name)
+        description_json = json.dumps(description, sort_keys=True)
+
+        if row is not None:
+            old_hash, mtime_ns, size, old_description = row
+            unchanged_file = (mtime_ns, size) == (stat.st_mtime_ns, stat.st_size)
+            if not unchanged_file:
+                # Fichier touché : on ne réextrait que si le contenu a changé
+                unchanged_file = FontCache.hash_file(font_path) == old_hash
+                if unchanged_file:
+                    self.connection.execute(
+                        "UPDATE fonts SET mtime_ns = ?, size = ? WHERE path = ?",
+                        (stat.st_mtime_ns, stat.st_size, path))
+            if unchanged_file:
+                if description_json != old_description:
+                    self._write_tags(path, description, description_json)
+                    stats['updated'] += 1
+                else:
+                    stats['unchanged'] += 1
+                return
+
+        font_data = self.font_processor.process_font(font_path, metadata_only=True)
+        font = font_data['font']
+        try:
+            metadata = font_data['metadata']
+            maxp = font['maxp']
+            # maxp donne le nombre maximum de points sans parcourir les glyphes
+            max_points = max(getattr(maxp, 'maxPoints', 0), getattr(maxp, 'maxCompositePoints', 0))
+
+            self.connection.execute("DELETE FROM fonts WHERE path = ?", (path,))
+            self.connection.execute(
+                f"INSERT INTO fonts (path, hash, mtime_ns, size, {', '.join(METADATA_FIELDS)}, "
+                f"num_glyphs, max_points, description) VALUES ({', '.join('?' * (len(METADATA_FIELDS) + 7))})",
+                (path, FontCache.hash_file(font_path), stat.st_mtime_ns, stat.st_size,
+                 *[metadata[field] for field in METADATA_FIELDS],
+                 maxp.numGlyphs, max_points, description_json))
+            self.connection.executemany(
+                "INSERT INTO axes (path, tag, min_value, default_value, max_value) VALUES (?, ?, ?, ?, ?)",
+                [(path, axis['tag'], axis['min_value'], axis['default_value'], axis['max_value'])
+                 for axis in font_data['variation_axes']])
+            self.connection.executemany(
+                "INSERT INTO instances (path, name, coordinates) VALUES (?, ?, ?)",
+                [(path, instance['name'], json.dumps(instance['coordinates']))
+                 for instance in font_data['instances']])
+            self._write_tags(path, description, description_json)
+        finally:
+            font.close()
+
+        stats['added' if row is None else 'updated'] += 1
+
+    def _write_tags(self, path: str, description: Dict, description_json: str) -> None:
+        self.connection.execute("UPDATE fonts SET description = ? WHERE path = ?", (description_json, path))
+        self.connection.execute("DELETE FROM tags WHERE path = ?", (path,))
+        self.connection.executemany(
+            "INSERT INTO tags (path, tag) VALUES (?, ?)",
+            [(path, tag) for tag in (description or {}).get('tags') or []])
+
+    def query(self, tags: Optional[List[str]] = None, axes: Optional[List[str]] = None,
+              is_variable: Optional[bool] = None, max_points_below: Optional[int] = None,
+              units_per_em: Optional[int] = None) -> List[str]:
+        """
+        Filtre les polices du catalogue.
+
+        Exemple : polices variables sans-serif avec un axe wght et moins de
+        2000 points par glyphe :
+            catalog.query(tags=['sans-serif'], axes=['wght'], is_variable=True, max_points_below=2000)
+
+        Returns:
+            Chemins des polices correspondant à tous les critères
+        """
+        conditions = []
+        params: List[Any] = []
+        for tag in tags or []:
+            conditions.append("path IN (SELECT path FROM tags WHERE tag = ?)")
+            params.append(tag)
+        for axis in axes or []:
+            conditions.append("path IN (SELECT path FROM axes WHERE tag = ?)")
+            params.append(axis)
+        if is_variable is not None:
+            conditions.append("is_variable = ?")
+            params.append(int(is_variable))
+        if max_points_below is not None:
+            conditions.append("max_points < ?")
+            params.append(max_points_below)
+        if units_per_em is not None:
+            conditions.append("units_per_em = ?")
+            params.append(units_per_em)
+
+        sql = "SELECT path FROM fonts"
+        if conditions:
+            sql += " WHERE " + " AND ".join(conditions)
+        return [row[0] for row in self.connection.execute(sql + " ORDER BY path", params)]
+
+    def get(self, path: str) -> Optional[Dict[str, Any]]:
+        """Entrée complète d'une police, au format de FontProcessor"""
+        self.connection.row_factory = sqlite3.Row
+        try:
+            row = self.connection.execute("SELECT * FROM fonts WHERE path = ?", (str(path),)).fetchone()
+            if row is None:
+                return None
+            axes = self.connection.execute(
+                "SELECT tag, min_value, default_value, max_value FROM axes WHERE path = ?", (str(path),)).fetchall()
+            instances = self.connection.execute(
+                "SELECT name, coordinates FROM instances WHERE path = ?", (str(path),)).fetchall()
+        finally:
+            self.connection.row_factory = None
+
+        metadata = {field: row[field] for field in METADATA_FIELDS}
+        metadata['is_variable'] = bool(metadata['is_variable'])
+        return {
+            'path': row['path'],
+            'hash': row['hash'],
+            'metadata': metadata,
+            'description': json.loads(row['description']),
+            'variation_axes': [dict(axis) for axis in axes],
+            'instances': [{'name': i['name'], 'coordinates': json.loads(i['coordinates'])} for i in instances],
+            'num_glyphs': row['num_glyphs'],
+            'max_points': row['max_points'],
+        }
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Mise à jour du catalogue de polices")
+    parser.add_argument('--config', type=Path, default=Path('configs/data/default.yaml'))
+    args = parser.parse_args(argv)
+
+    with open(args.config) as f:
+        config = yaml.safe_load(f)['data']
+
+    font_dir = Path(config['font_dir'])
+    font_paths = sorted(p for p in font_dir.rglob("*") if p.suffix.lower() == '.ttf')
+
+    catalog = FontCatalog(Path(config.get('catalog_path', 'data/catalog.sqlite')))
+    stats = catalog.update(font_paths)
+    print(f"Catalogue : {stats}")
+
+    matches = catalog.query(tags=['sans-serif'], axes=['wght'], is_variable=True, max_points_below=2000)
+    print(f"Polices variables sans-serif avec axe wght et < 2000 points : {len(matches)}")
+    for path in matches:
+        print(f"  {path}")
+    catalog.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,371 @@
+# src/data/datasets/glyph_dataset.py
+import logging
+import random
+import numpy as np
+import torch
+import yaml
+from collections import OrderedDict
+from functools import partial
+from pathlib import Path
+from typing import Dict, Any, Iterator, List, Optional
+from torch.utils.data import DataLoader, Dataset, IterableDataset, get_worker_info
+
+from src.data.cache.font_cache import FontCache
+from src.data.datasets.samplers import LengthBucketBatchSampler
+from src.data.datasets.shard_dataset import ShardedGlyphDataset
+from src.data.instrumentation import get_instrumentation
+from src.data.processors.charset import Charset
+from src.data.processors.font_processor import FontProcessor
+from src.data.processors.normalization import GlyphNormalizer, load_corpus_statistics
+from src.data.processors.style_embeddings import StyleEmbeddingTable
+from src.data.processors.tensor_processor import TensorProcessor
+
+logger = logging.getLogger(__name__)
+
+class GlyphDataset(IterableDataset):
+    """
+    Dataset de glyphes qui ouvre les polices à la demande.
+
+    Les polices sont réparties entre les workers du DataLoader ; chaque worker
+    n'ouvre qu'une police à la fois (depuis le cache memory-mappé si disponible)
+    et en émet les glyphes un par un. Le style est transmis sous forme d'indice
+    dans une StyleEmbeddingTable plutôt que de vecteur. Avec un charset, les
+    caractères absents ou vides d'une police ne sont pas émis.
+
+    Avec `normalization` (statistiques de corpus), les points sont normalisés
+    dans le worker, police par police, dès son chargement : l'échelle d'une
+    police ne dépend que de ses units_per_em, et aucune passe préalable sur
+    le corpus n'est nécessaire. Sans, ils restent en unités de la police.
+    """
+
+    def __init__(self, font_paths: List[Path], cache: Optional[FontCache] = None,
+                 shuffle: bool = False, seed: int = 0, style_table: Optional[StyleEmbeddingTable] = None,
+                 charset: Optional[Charset] = None, normalization: Optional[Dict[str, Any]] = None):
+        self.font_paths = sorted(Path(p) for p in font_paths)
+        self.style_ids = [style_table.font_id(p.name) if style_table else 0 for p in self.font_paths]
+        self.cache = cache
+        self.charset = charset
+        self.normalization = normalization
+        self.shuffle = shuffle
+        self.seed = seed
+        self.epoch = 0
+        # Processeurs créés paresseusement dans chaque worker
+        self._font_processor = None
+        self._tensor_processor = None
+
+    @classmethod
+    def from_dir(cls, font_dir: Path, cache: Optional[FontCache] = None, **kwargs) -> 'GlyphDataset':
+        font_paths = [p for p in Path(font_dir).rglob("*") if p.suffix.lower() == '.ttf']
+        return cls(font_paths, cache, **kwargs)
+
+    def set_epoch(self, epoch: int) -> None:
+        """
+        Change l'ordre de mélange des polices d'une époque à l'autre.
+
+        Appelé par TypeFacerModel.on_train_epoch_start ; l'époque atteint les
+        workers car le dataset leur est transmis à chaque époque (workers non
+        persistants).
+        """
+        self.epoch = epoch
+
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        font_indices = list(range(len(self.font_paths)))
+        if self.shuffle:
+            random.Random(self.seed + self.epoch).shuffle(font_indices)
+
+        # Chaque worker prend une police sur num_workers
+        worker_info = get_worker_info()
+        if worker_info is not None:
+            font_indices = font_indices[worker_info.id::worker_info.num_workers]
+
+        for font_index in font_indices:
+            try:
+                data = self._load_font(self.font_paths[font_index])
+            except Exception as e:
+                get_instrumentation().failure('dataset.fonts', self.font_paths[font_index], e)
+                logger.warning("Erreur avec la police %s: %s", self.font_paths[font_index], e)
+                continue
+
+            glyphs, lengths = data['glyphs'], data['glyph_lengths']
+            if self.normalization is not None and len(lengths):
+                normalizer = GlyphNormalizer(data['font_stats'].numpy()[None], self.normalization)
+                glyphs = normalizer.normalize(glyphs, torch.zeros(len(glyphs), dtype=torch.long))
+            for glyph_index in range(len(lengths)):
+                length = int(lengths[glyph_index])
+                if length == 0:
+                    continue
+                yield {
+                    'points': glyphs[glyph_index, :length],
+                    'length': length,
+                    'font_index': font_index,
+                    'glyph_index': glyph_index,
+                    'style_id': self.style_ids[font_index],
+                }
+
+    def _load_font(self, font_path: Path) -> Dict[str, Any]:
+        """Charge une police depuis le cache, ou la traite directement"""
+        if self._font_processor is None:
+            self._font_processor = FontProcessor()
+            self._tensor_processor = TensorProcessor(charset=self.charset)
+
+        if self.cache is not None:
+            return self.cache.load_or_process(font_path, self._font_processor, self._tensor_processor)
+
+        font_data = self._font_processor.process_font(font_path)
+        return self._tensor_processor.process_font_to_tensor(font_data)
+
+
+class IndexedGlyphDataset(Dataset):
+    """
+    Dataset de glyphes à accès aléatoire, adossé au cache des polices.
+
+    Seules les longueurs des glyphes et les statistiques de normalisation des
+    polices sont lues à la construction (pour les samplers par longueur et
+    collate_glyphs) ; les points sont lus à la demande depuis les
+    entrées memory-mappées, en gardant au plus `max_open_fonts` polices ouvertes.
+    Les glyphes vides (caractères absents du charset) ne sont pas indexés.
+    """
+
+    def __init__(self, font_paths: List[Path], cache: FontCache, max_open_fonts: int = 8,
+                 style_table: Optional[StyleEmbeddingTable] = None, normalization: Optional[Dict[str, Any]] = None):
+        """
+        Args:
+            normalization: Statistiques de corpus de `normalizer` ; recalculées
+                depuis les polices du dataset si absentes
+        """
+        self.cache = cache
+        self.max_open_fonts = max_open_fonts
+        self.font_paths = []
+        self.keys = []
+        self._open_fonts: OrderedDict = OrderedDict()
+        self._font_processor = FontProcessor()
+        # Même charset que celui de la clé du cache
+        self._tensor_processor = TensorProcessor(charset=cache.charset)
+
+        lengths = []
+        positions = []
+        font_stats = []
+        for font_path in sorted(Path(p) for p in font_paths):
+            try:
+                key = cache.key(font_path)
+                data = cache.get(font_path, key)
+                if data is None:
+                    data = cache.load_or_process(font_path, self._font_processor, self._tensor_processor)
+            except Exception as e:
+                get_instrumentation().failure('dataset.fonts', font_path, e)
+                logger.warning("Erreur avec la police %s: %s", font_path, e)
+                continue
+            self.font_paths.append(font_path)
+            self.keys.append(key)
+            font_lengths = data['glyph_lengths'].numpy()
+            positions.append(np.flatnonzero(font_lengths > 0))
+            lengths.append(font_lengths[positions[-1]])
+            font_stats.append(data['font_stats'].numpy().copy())
+
+        self.style_ids = [style_table.font_id(p.name) if style_table else 0 for p in self.font_paths]
+        self.lengths = np.concatenate(lengths) if lengths else np.zeros(0, dtype=np.int64)
+        # Position de chaque glyphe dans le tenseur de sa police
+        self.glyph_positions = np.concatenate(positions) if positions else np.zeros(0, dtype=np.int64)
+        self.font_offsets = np.concatenate([[0], np.cumsum([len(l) for l in lengths])]).astype(np.int64)
+        self.normalizer = GlyphNormalizer(np.stack(font_stats) if font_stats else np.zeros(0), normalization)
+
+    @classmethod
+    def from_dir(cls, font_dir: Path, cache: FontCache, **kwargs) -> 'IndexedGlyphDataset':
+        font_paths = [p for p in Path(font_dir).rglob("*") if p.suffix.lower() == '.ttf']
+        return cls(font_paths, cache, **kwargs)
+
+    def __len__(self) -> int:
+        return len(self.lengths)
+
+    def __getitem__(self, index: int) -> Dict[str, Any]:
+        font_index = int(np.searchsorted(self.font_offsets, index, side='right')) - 1
+        glyph_index = int(self.glyph_positions[index])
+        length = int(self.lengths[index])
+        glyphs = self._open_font(font_index)['glyphs']
+        return {
+            'points': glyphs[glyph_index, :length],
+            'length': length,
+            'font_index': font_index,
+            'glyph_index': glyph_index,
+            'style_id': self.style_ids[font_index],
+        }
+
+    def _open_font(self, font_index: int) -> Dict[str, Any]:
+        """Ouvre une entrée du cache, en gardant les plus récentes ouvertes"""
+        if font_index in self._open_fonts:
+            self._open_fonts.move_to_end(font_index)
+            return self._open_fonts[font_index]
+
+        font_path = self.font_paths[font_index]
+        data = self.cache.get(font_path, self.keys[font_index])
+        if data is None:
+            # Entrée évincée du cache entre-temps
+            data = self.cache.load_or_process(font_path, self._font_processor, self._tensor_processor)
+
+        self._open_fonts[font_index] = data
+        if len(self._open_fonts) > self.max_open_fonts:
+            self._open_fonts.popitem(last=False)
+        return data
+
+
+def collate_glyphs(batch: List[Dict[str, Any]], pad_multiple: int = 1,
+                   normalizer: Optional[GlyphNormalizer] = None) -> Dict[str, torch.Tensor]:
+    """
+    Assemble un batch de glyphes en ne paddant que jusqu'au plus long du batch.
+
+    Args:
+        batch: Échantillons émis par GlyphDataset
+        pad_multiple: Arrondit la longueur paddée au multiple supérieur, pour
+            limiter le nombre de formes distinctes vues par le modèle
+        normalizer: Normalisation du dataset, appliquée au batch entier (les
+            points des datasets sont en unités de leur police) ; sans elle,
+            les points sont laissés tels quels
+
+    Returns:
+        Dict avec `points` (B, L, 2), `lengths` (B,), `mask` (B, L),
+        `font_index`, `glyph_index` et `style_id` (B,)
+    """
+    lengths = torch.tensor([sample['length'] for sample in batch], dtype=torch.long)
+    max_length = int(lengths.max()) if len(batch) else 0
+    max_length = -(-max_length // pad_multiple) * pad_multiple
+
+    points = torch.zeros((len(batch), max_length, 2), dtype=torch.float32)
+    for i, sample in enumerate(batch):
+        points[i, :sample['length']] = sample['points']
+
+    mask = torch.arange(max_length).unsqueeze(0) < lengths.unsqueeze(1)
+    font_index = torch.tensor([sample['font_index'] for sample in batch], dtype=torch.long)
+    if normalizer is not None:
+        points = normalizer.normalize(points, font_index, mask)
+
+    return {
+        'points': points,
+        'lengths': lengths,
+        'mask': mask,
+        'font_index': font_index,
+        'glyph_index': torch.tensor([sample['glyph_index'] for sample in batch], dtype=torch.long),
+        'style_id': torch.tensor([sample['style_id'] for sample in batch], dtype=torch.long),
+    }
+
+
+def resolve_device(name: str = 'auto') -> torch.device:
+    """Device de la config : 'auto' choisit cuda, puis mps, puis cpu"""
+    if name != 'auto':
+        return torch.device(name)
+    if torch.cuda.is_available():
+        return torch.device('cuda')
+    if torch.backends.mps.is_available():
+        return torch.device('mps')
+    return torch.device('cpu')
+
+
+def transfer_batch(batch: Dict[str, torch.Tensor], device: torch.device,
+                   non_blocking: bool = True) -> Dict[str, torch.Tensor]:
+    """
+    Transfère un batch collationné vers le device, en une copie par tenseur.
+
+    Les copies ne sont réellement asynchrones que depuis de la mémoire
+    épinglée (DataLoader avec `pin_memory=True`).
+    """
+    return {key: value.to(device, non_blocking=non_blocking) if isinstance(value, torch.Tensor) else value
+            for key, value in batch.items()}
+
+
+def create_dataloader(config_path: Path = Path('configs/data/default.yaml'), split: str = 'train',
+                      pad_multiple: int = 1, bucketed: bool = False, batch_size: Optional[int] = None,
+                      sharded: bool = False, **kwargs) -> DataLoader:
+    """
+    Construit un DataLoader de glyphes à partir de la config de données.
+
+    Avec `bucketed=True`, les glyphes sont lus via IndexedGlyphDataset et
+    regroupés par longueur selon `bucket_boundaries` (nécessite `cache_dir`).
+    Avec `sharded=True`, ils sont lus en memory-map dans les shards de
+    `shards_dir` produits par `python -m src.data.ingest`, qui doivent avoir
+    été ingérés avec le même `charset`.
+
+    Tous les chemins normalisent les points avec les mêmes statistiques de
+    corpus : celles du manifeste des shards d'entraînement, que reprennent
+    aussi FontWriter et le serveur d'inférence, ou EM_CORPUS sans ingestion
+    (voir normalization.load_corpus_statistics). Chaque police est mise à
+    l'échelle de ses propres units_per_em. Les batches restent sur CPU ; avec
+    `pin_memory` dans la config et un GPU CUDA disponible, ils sont épinglés
+    par le DataLoader pour que le transfert (transfer_batch ou Lightning)
+    soit non bloquant.
+    """
+    with open(config_path) as f:
+        config = yaml.safe_load(f)['data']
+
+    charset = Charset.from_config(config.get('charset'))
+    cache = FontCache(Path(config['cache_dir']), config.get('cache_max_size_mb'), charset) \
+        if config.get('cache_dir') else None
+    font_dir = Path(config[f"{split}_dir"])
+    shards_dir = Path(config.get('shards_dir', 'data/shards'))
+    normalization = load_corpus_statistics(shards_dir / 'train' / 'manifest.json')
+    num_workers = config.get('num_workers', 0)
+    batch_size = batch_size or config['batch_size']
+    # La mémoire épinglée ne sert qu'aux copies vers un GPU CUDA
+    kwargs.setdefault('pin_memory', bool(config.get('pin_memory', True)) and torch.cuda.is_available())
+    style_table = StyleEmbeddingTable(
+        FontProcessor().font_descriptions,
+        dim=config.get('style_embedding_dim', 256),
+        cache_dir=Path(config['cache_dir']) if config.get('cache_dir') else None)
+
+    if sharded:
+        dataset = ShardedGlyphDataset(shards_dir / split, style_table=style_table, normalization=normalization)
+        if (dataset.codepoints is None) != (charset is None) or \
+                (charset is not None and not np.array_equal(dataset.codepoints, charset.codepoints)):
+            raise ValueError(f"Les shards de {dataset.shards_dir} n'ont pas le charset de la config, "
+                             f"relancer l'ingestion")
+        if not bucketed:
+            return DataLoader(
+                dataset,
+                batch_size=batch_size,
+                shuffle=(split == 'train'),
+                num_workers=num_workers,
+                collate_fn=partial(collate_glyphs, pad_multiple=pad_multiple, normalizer=dataset.normalizer),
+                **kwargs
+            )
+
+    if bucketed:
+        if not sharded:
+            if cache is None:
+                raise ValueError("Le chargement par buckets nécessite cache_dir dans la config")
+            dataset = IndexedGlyphDataset.from_dir(font_dir, cache, style_table=style_table,
+                                                   normalization=normalization)
+        batch_sampler = LengthBucketBatchSampler(
+            dataset.lengths,
+            batch_size=batch_size,
+            boundaries=config.get('bucket_boundaries', [32, 64, 128, 256]),
+            shuffle=(split == 'train'),
+        )
+        return DataLoader(
+            dataset,
+            batch_sampler=batch_sampler,
+            num_workers=num_workers,
+            collate_fn=partial(collate_glyphs, pad_multiple=pad_multiple, normalizer=dataset.normalizer),
+            **kwargs
+        )
+
+    # Normalisation faite dans les workers, police par police
+    dataset = GlyphDataset.from_dir(font_dir, cache, shuffle=(split == 'train'), style_table=style_table,
+                                    charset=charset, normalization=normalization)
+    return DataLoader(
+        dataset,
+        batch_size=batch_size,
+        num_workers=num_workers,
+        collate_fn=partial(collate_glyphs, pad_multiple=pad_multiple),
+        **kwargs
+    )
+
+
+if __name__ == "__main__":
+    # Test du dataset, avec et sans buckets
+    for bucketed in (False, True):
+        loader = create_dataloader(bucketed=bucketed)
+        num_glyphs = 0
+        for i, batch in enumerate(loader):
+            num_glyphs += len(batch['lengths'])
+            if i == 0:
+                print(f"Premier batch : points {tuple(batch['points'].shape)}, "
+                      f"remplissage {batch['mask'].float().mean():.1%}")
+        print(f"Nombre de glyphes chargés (buckets={bucketed}) : {num_glyphs}")
@@ -0,0 +1,93 @@
+# src/data/datasets/samplers.py
+import logging
+import numpy as np
+from typing import Dict, Iterator, List, Optional, Sequence
+from torch.utils.data import Sampler
+
+from src.data.instrumentation import get_instrumentation
+
+logger = logging.getLogger(__name__)
+
+class LengthBucketBatchSampler(Sampler[List[int]]):
+    """
+    Batch sampler qui regroupe les glyphes par nombre de points.
+
+    Chaque glyphe est rangé dans un bucket selon `boundaries` ; les batches sont
+    formés à l'intérieur d'un bucket (mélangé) puis l'ordre des batches est
+    mélangé. Le contenu vu par le modèle ne change pas, seul le padding diminue.
+
+    Les points utiles et paddés sont comptés à chaque batch émis (compteurs
+    `sampler.points.real` et `sampler.points.padded` de l'instrumentation, et
+    entrée de l'époque en cours dans `epoch_stats`) : une époque interrompue
+    garde ses statistiques partielles.
+    """
+
+    def __init__(self, lengths: Sequence[int], batch_size: int, boundaries: Sequence[int],
+                 shuffle: bool = True, drop_last: bool = False, seed: int = 0):
+        self.lengths = np.asarray(lengths, dtype=np.int64)
+        self.batch_size = batch_size
+        self.boundaries = sorted(boundaries)
+        self.shuffle = shuffle
+        self.drop_last = drop_last
+        self.seed = seed
+        self.epoch = 0
+        self.epoch_stats: List[Dict[str, float]] = []
+
+        # Index des glyphes par bucket, calculé une fois
+        bucket_ids = np.digitize(self.lengths, self.boundaries, right=True)
+        self.buckets = [np.flatnonzero(bucket_ids == b) for b in range(len(self.boundaries) + 1)]
+
+    def set_epoch(self, epoch: int) -> None:
+        self.epoch = epoch
+
+    def _make_batches(self, rng: Optional[np.random.Generator]) -> List[np.ndarray]:
+        batches = []
+        for bucket in self.buckets:
+            if rng is not None:
+                bucket = rng.permutation(bucket)
+            for start in range(0, len(bucket), self.batch_size):
+                batch = bucket[start:start + self.batch_size]
+                if self.drop_last and len(batch) < self.batch_size:
+                    continue
+                batches.append(batch)
+
+        if rng is not None:
+            batches = [batches[i] for i in rng.permutation(len(batches))]
+        return batches
+
+    def __iter__(self) -> Iterator[List[int]]:
+        rng = np.random.default_rng(self.seed + self.epoch) if self.shuffle else None
+        batches = self._make_batches(rng)
+
+        instrumentation = get_instrumentation()
+        stats = {'epoch': self.epoch, 'batches': 0, 'real_points': 0, 'padded_points': 0, 'padding_efficiency': 1.0}
+        self.epoch_stats.append(stats)
+        for batch in batches:
+            batch_lengths = self.lengths[batch]
+            real_points = int(batch_lengths.sum())
+            padded_points = int(batch_lengths.max()) * len(batch)
+            stats['batches'] += 1
+            stats['real_points'] += real_points
+            stats['padded_points'] += padded_points
+            stats['padding_efficiency'] = stats['real_points'] / stats['padded_points']
+            instrumentation.count('sampler.points.real', real_points)
+            instrumentation.count('sampler.points.padded', padded_points)
+            yield batch.tolist()
+
+        logger.info("Époque %d : efficacité du padding %.1f%% (%d/%d points utiles)", self.epoch,
+                    100 * stats['padding_efficiency'], stats['real_points'], stats['padded_points'])
+
+    def __len__(self) -> int:
+        if self.drop_last:
+            return sum(len(bucket) // self.batch_size for bucket in self.buckets)
+        return sum(-(-len(bucket) // self.batch_size) for bucket in self.buckets)
+
+    def padding_efficiency(self) -> float:
+        """Efficacité attendue sans mélange : points réels / points après padding"""
+        real_points = 0
+        padded_points = 0
+        for batch in self._make_batches(None):
+            batch_lengths = self.lengths[batch]
+            real_points += int(batch_lengths.sum())
+            padded_points += int(batch_lengths.max()) * len(batch)
+        return real_points / padded_points if padded_points else 1.0
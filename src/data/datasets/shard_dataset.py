@@ -0,0 +1,136 @@
+# src/data/datasets/shard_dataset.py
+import json
+import numpy as np
+import torch
+from pathlib import Path
+from typing import Dict, Any, List, Optional, Tuple
+from torch.utils.data import Dataset
+
+from src.data.processors.normalization import FONT_STATS_FIELDS, GlyphNormalizer
+from src.data.processors.style_embeddings import StyleEmbeddingTable
+
+# Structure des tables par glyphe et par police écrites par ShardWriter
+GLYPH_TABLE_DTYPE = np.dtype([('offset', '<i8'), ('length', '<i4'), ('font', '<i4'), ('glyph', '<i4')])
+FONT_TABLE_DTYPE = np.dtype([('first_glyph', '<i8'), ('num_glyphs', '<i4'),
+                             ('stats', '<f4', (len(FONT_STATS_FIELDS),))])
+
+# À incrémenter si la disposition des shards change
+SHARD_FORMAT_VERSION = 3
+
+class ShardedGlyphDataset(Dataset):
+    """
+    Dataset de glyphes à accès aléatoire sur les shards écrits par l'ingestion.
+
+    Les tableaux de points sont ouverts en memory-map dans chaque worker, à la
+    première lecture : un glyphe est une simple tranche de `points.npy`, sans
+    charger la police entière ni dépickler quoi que ce soit, et tous les
+    workers partagent le page cache du système. Seules les tables de
+    glyphes (quelques octets par glyphe) sont lues à la construction.
+
+    Les points sont en unités de leur police ; `normalizer` reprend les
+    statistiques par police des shards et celles du corpus du manifeste (ou
+    `normalization` si fourni), et s'applique au batch dans collate_glyphs.
+
+    Si l'ingestion a utilisé un charset, `glyph_index` est la position du
+    caractère dans `codepoints` et `present` (F, len(codepoints)) indique
+    les caractères de chaque police.
+    """
+
+    def __init__(self, shards_dir: Path, style_table: Optional[StyleEmbeddingTable] = None,
+                 normalization: Optional[Dict[str, Any]] = None):
+        """
+        Args:
+            normalization: Statistiques de corpus à utiliser à la place de celles
+                du manifeste (celles du split d'entraînement pour la validation)
+        """
+        self.shards_dir = Path(shards_dir)
+        with open(self.shards_dir / 'manifest.json') as f:
+            manifest = json.load(f)
+        if manifest.get('format_version') != SHARD_FORMAT_VERSION:
+            raise ValueError(f"Format de shards {manifest.get('format_version')} non supporté "
+                             f"dans {self.shards_dir} (attendu {SHARD_FORMAT_VERSION}), relancer l'ingestion")
+
+        self.shard_names: List[str] = manifest['shards']
+        self.font_paths: List[str] = []
+        style_ids = []
+        lengths = []
+        glyph_counts = []
+        font_counts = []
+        font_stats = []
+        present = []
+        charset = manifest.get('charset')
+        for name in self.shard_names:
+            table = np.load(self.shards_dir / name / 'glyphs.npy', mmap_mode='r')
+            font_stats.append(np.load(self.shards_dir / name / 'fonts.npy')['stats'])
+            if charset is not None:
+                present.append(np.load(self.shards_dir / name / 'present.npy'))
+            with open(self.shards_dir / name / 'fonts.json') as f:
+                fonts = json.load(f)
+            lengths.append(np.array(table['length'], dtype=np.int64))
+            glyph_counts.append(len(table))
+            font_counts.append(len(fonts))
+            for font in fonts:
+                self.font_paths.append(font['path'])
+                style_ids.append(style_table.font_id(Path(font['path']).name) if style_table else 0)
+
+        self.style_ids = np.array(style_ids, dtype=np.int64)
+        self.lengths = np.concatenate(lengths) if lengths else np.zeros(0, dtype=np.int64)
+        self.shard_offsets = np.concatenate([[0], np.cumsum(glyph_counts)]).astype(np.int64)
+        self.shard_font_offsets = np.concatenate([[0], np.cumsum(font_counts)]).astype(np.int64)
+        self.codepoints = np.array(charset['codepoints'], dtype=np.int64) if charset is not None else None
+        self.present = np.concatenate(present) if present else None
+        self.normalizer = GlyphNormalizer(
+            np.concatenate(font_stats) if font_stats else np.zeros((0, len(FONT_STATS_FIELDS)), dtype=np.float32),
+            normalization or manifest.get('normalization'))
+        # Memory-maps ouverts à la demande, propres à chaque processus
+        self._shards: Dict[int, Tuple[np.ndarray, np.ndarray]] = {}
+
+    def __getstate__(self) -> Dict[str, Any]:
+        # Pickler un memmap copierait son contenu : chaque worker rouvre les siens
+        state = self.__dict__.copy()
+        state['_shards'] = {}
+        return state
+
+    def __len__(self) -> int:
+        return len(self.lengths)
+
+    def _open_shard(self, shard_index: int) -> Tuple[np.ndarray, np.ndarray]:
+        if shard_index not in self._shards:
+            shard_dir = self.shards_dir / self.shard_names[shard_index]
+            # mmap_mode='c' : pages partagées et tableau inscriptible pour torch.from_numpy
+            self._shards[shard_index] = (
+                np.load(shard_dir / 'points.npy', mmap_mode='c'),
+                np.load(shard_dir / 'glyphs.npy', mmap_mode='r'),
+            )
+        return self._shards[shard_index]
+
+    def __getitem__(self, index: int) -> Dict[str, Any]:
+        shard_index = int(np.searchsorted(self.shard_offsets, index, side='right')) - 1
+        points, table = self._open_shard(shard_index)
+        row = table[index - self.shard_offsets[shard_index]]
+        offset, length = int(row['offset']), int(row['length'])
+        font_index = int(self.shard_font_offsets[shard_index]) + int(row['font'])
+        return {
+            'points': torch.from_numpy(points[offset:offset + length]),
+            'length': length,
+            'font_index': font_index,
+            'glyph_index': int(row['glyph']),
+            'style_id': int(self.style_ids[font_index]),
+        }
+
+    def font_metadata(self, font_index: int) -> Dict[str, Any]:
+        """Métadonnées d'une police (chemin, nom, description, axes, instances)"""
+        shard_index = int(np.searchsorted(self.shard_font_offsets, font_index, side='right')) - 1
+        with open(self.shards_dir / self.shard_names[shard_index] / 'fonts.json') as f:
+            return json.load(f)[font_index - self.shard_font_offsets[shard_index]]
+
+
+if __name__ == "__main__":
+    # Test du dataset (après python -m src.data.ingest)
+    dataset = ShardedGlyphDataset(Path('data/shards/train'))
+    print(f"{len(dataset)} glyphes, {len(dataset.font_paths)} polices, {len(dataset.shard_names)} shards")
+    if len(dataset):
+        sample = dataset[len(dataset) // 2]
+        print(f"Glyphe {sample['glyph_index']} de {dataset.font_paths[sample['font_index']]} : "
+              f"{tuple(sample['points'].shape)}")
+    print(f"Normalisation du corpus : {dataset.normalizer.corpus}")
@@ -0,0 +1,531 @@
+# src/data/ingest.py
+"""
+Ingestion parallèle du corpus de polices vers un dataset shardé.
+
+L'ingestion est incrémentale : le manifeste de chaque split enregistre, par
+shard, le hash de chaque police source, le hash de son entrée de description
+et la version du code. Une nouvelle exécution ne retraite que les polices
+nouvelles ou modifiées (et celles des shards à reconstruire) ; si seules des
+descriptions ont changé, seuls les fonts.json concernés et les embeddings de
+style sont réécrits.
+
+Usage :
+    python -m src.data.ingest --config configs/data/default.yaml
+    python -m src.data.ingest --full  # reconstruit tous les shards
+    python -m src.data.ingest --profile profiles/ingest.prof --metrics logs/ingest-metrics.jsonl
+"""
+import argparse
+import hashlib
+import json
+import logging
+import os
+import shutil
+import time
+import traceback
+import numpy as np
+import yaml
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Dict, Any, List, Optional, Tuple
+
+from src.data.cache.font_cache import FontCache
+from src.data.datasets.shard_dataset import FONT_TABLE_DTYPE, GLYPH_TABLE_DTYPE, SHARD_FORMAT_VERSION
+from src.data.instrumentation import Instrumentation, get_instrumentation, profile
+from src.data.prefetch import FontPrefetcher, read_bytes
+from src.data.processors.charset import Charset
+from src.data.processors.font_processor import FontProcessor, load_font_descriptions
+from src.data.processors.normalization import corpus_statistics
+from src.data.processors.style_embeddings import StyleEmbeddingTable
+from src.data.processors.tensor_processor import PROCESSOR_VERSION, TensorProcessor
+
+logger = logging.getLogger(__name__)
+
+# Version du code ayant produit les shards : tout changement force une reconstruction
+CODE_VERSION = f"processor-v{PROCESSOR_VERSION}-shards-v{SHARD_FORMAT_VERSION}"
+
+# Processeurs créés une seule fois par processus worker
+_worker_state: Dict[str, Any] = {}
+
+
+def _init_worker(cache_dir: Optional[str], cache_max_size_mb: Optional[float], charset: Optional[Charset]) -> None:
+    _worker_state['font_processor'] = FontProcessor()
+    _worker_state['tensor_processor'] = TensorProcessor(charset=charset)
+    _worker_state['cache'] = FontCache(Path(cache_dir), cache_max_size_mb, charset) if cache_dir else None
+
+
+def _ingest_font(font_path: Path, data: Optional[bytes] = None) -> Dict[str, Any]:
+    """
+    Traite une police dans un worker, depuis ses octets déjà lus si fournis.
+
+    Les exceptions sont capturées et renvoyées pour ne pas interrompre l'ingestion.
+    Les métriques accumulées par le worker pour cette police sont jointes au
+    résultat, puis agrégées par le processus principal.
+    """
+    instrumentation = get_instrumentation()
+    instrumentation.reset()
+    try:
+        font_processor = _worker_state['font_processor']
+        tensor_processor = _worker_state['tensor_processor']
+        cache = _worker_state['cache']
+
+        with instrumentation.timer('ingest.font'):
+            if cache is not None:
+                font = cache.load_or_process(font_path, font_processor, tensor_processor, data=data)
+            else:
+                font = font_processor.process_font(font_path, data=data)
+                font.update(tensor_processor.process_font_to_tensor(font))
+        data = font
+
+        glyphs = data['glyphs'].numpy()
+        lengths = data['glyph_lengths'].numpy()
+        # Les points sont repliés en un tableau plat (sans padding) avant l'envoi au processus principal
+        mask = np.arange(glyphs.shape[1])[None, :] < lengths[:, None] if glyphs.ndim == 3 else None
+        points = glyphs[mask] if mask is not None else np.empty((0, 2), dtype=np.float32)
+
+        return {
+            'path': str(font_path),
+            'points': points,
+            'lengths': lengths,
+            'present': data['glyph_present'].numpy(),
+            'font_stats': data['font_stats'].numpy(),
+            'metadata': data['metadata'],
+            'description': data['description'],
+            'variation_axes': data['variation_axes'],
+            'instances': data['instances'],
+            'metrics': instrumentation.snapshot(),
+        }
+    except Exception as e:
+        instrumentation.failure('ingest.fonts', font_path, e)
+        return {
+            'path': str(font_path),
+            'error': f"{type(e).__name__}: {e}",
+            'traceback': traceback.format_exc(),
+            'metrics': instrumentation.snapshot(),
+        }
+
+
+class ShardWriter:
+    """
+    Écrit les polices traitées par shards de `shard_size` polices.
+
+    Chaque shard est un dossier de tableaux .npy bruts, lisibles par
+    np.load(mmap_mode=...) sans copie ni dépickling :
+        points.npy  (P, 2) float32, tous les points du shard à plat
+        glyphs.npy  (G,) GLYPH_TABLE_DTYPE : début dans points (partagé par
+                    les glyphes identiques, stockés une seule fois), longueur,
+                    police (locale au shard) et indice du glyphe dans la police
+                    (position dans le charset s'il y en a un) ; les glyphes
+                    vides ou absents ne sont pas listés
+        fonts.npy   (F,) FONT_TABLE_DTYPE : premier glyphe, nombre de glyphes
+                    et statistiques de normalisation de chaque police
+        present.npy (F, len(charset)) bool, avec un charset : caractères
+                    présents dans chaque police
+        fonts.json  métadonnées des polices (chemin, nom, description, axes...)
+    """
+
+    def __init__(self, output_dir: Path, shard_size: int, start_index: int = 0,
+                 charset: Optional[Charset] = None):
+        self.output_dir = Path(output_dir)
+        self.charset = charset
+        self.output_dir.mkdir(parents=True, exist_ok=True)
+        self.shard_size = shard_size
+        self.shard_index = start_index
+        self.pending: List[Dict[str, Any]] = []
+        self.shards: List[str] = []
+        # Par shard : polices sources, nombre de glyphes et de points
+        self.shard_info: Dict[str, Dict[str, Any]] = {}
+
+    def add(self, result: Dict[str, Any]) -> None:
+        self.pending.append(result)
+        if len(self.pending) >= self.shard_size:
+            self.flush()
+
+    def flush(self) -> None:
+        """Écrit les polices en attente dans un nouveau shard"""
+        if not self.pending:
+            return
+
+        name = f"shard-{self.shard_index:05d}"
+        shard_dir = self.output_dir / name
+        shard_dir.mkdir(parents=True, exist_ok=True)
+
+        # Les glyphes vides (absents du charset) n'ont pas de ligne ; `glyph` garde leur position
+        lengths = [r['lengths'] for r in self.pending]
+        positions = [np.flatnonzero(l > 0) for l in lengths]
+        glyph_counts = np.array([len(p) for p in positions], dtype=np.int64)
+        all_lengths = np.concatenate([l[p] for l, p in zip(lengths, positions)]).astype(np.int64) \
+            if lengths else np.zeros(0, dtype=np.int64)
+
+        points, offsets = self._deduplicate(
+            np.concatenate([r['points'] for r in self.pending]).astype(np.float32, copy=False).reshape(-1, 2),
+            all_lengths)
+
+        glyphs = np.zeros(len(all_lengths), dtype=GLYPH_TABLE_DTYPE)
+        glyphs['offset'] = offsets
+        glyphs['length'] = all_lengths
+        glyphs['font'] = np.repeat(np.arange(len(self.pending)), glyph_counts)
+        first_glyphs = np.concatenate([[0], np.cumsum(glyph_counts)[:-1]])
+        glyphs['glyph'] = np.concatenate(positions)
+
+        fonts = np.zeros(len(self.pending), dtype=FONT_TABLE_DTYPE)
+        fonts['first_glyph'] = first_glyphs
+        fonts['num_glyphs'] = glyph_counts
+        fonts['stats'] = np.stack([r['font_stats'] for r in self.pending])
+
+        np.save(shard_dir / 'points.npy', points)
+        np.save(shard_dir / 'glyphs.npy', glyphs)
+        np.save(shard_dir / 'fonts.npy', fonts)
+        if self.charset is not None:
+            np.save(shard_dir / 'present.npy', np.stack([r['present'] for r in self.pending]))
+        with open(shard_dir / 'fonts.json', 'w') as f:
+            json.dump([
+                {key: r[key] for key in ('path', 'metadata', 'description', 'variation_axes', 'instances')}
+                for r in self.pending
+            ], f)
+
+        self.shards.append(name)
+        self.shard_info[name] = {
+            'paths': [r['path'] for r in self.pending],
+            'glyphs': len(glyphs),
+            'points': len(points),
+            'expanded_points': int(all_lengths.sum()),
+        }
+        self.shard_index += 1
+        self.pending = []
+
+    @staticmethod
+    def _deduplicate(points: np.ndarray, lengths: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Ne garde qu'une copie des glyphes aux points identiques (mêmes contours
+        dans plusieurs graisses ou polices du shard) ; les doublons pointent
+        vers la même tranche de points.npy.
+
+        Returns:
+            Tuple (points uniques (P', 2), début de chaque glyphe dans ces points)
+        """
+        starts = np.concatenate([[0], np.cumsum(lengths)[:-1]]).astype(np.int64)
+        seen: Dict[bytes, int] = {}
+        keep = np.zeros(len(lengths), dtype=bool)
+        offsets = np.zeros(len(lengths), dtype=np.int64)
+        position = 0
+        for i, (start, length) in enumerate(zip(starts.tolist(), lengths.tolist())):
+            key = hashlib.blake2b(points[start:start + length].tobytes(), digest_size=16).digest()
+            if key not in seen:
+                seen[key] = position
+                keep[i] = True
+                position += length
+            offsets[i] = seen[key]
+        unique = points[np.repeat(keep, lengths)] if len(lengths) else points
+        return np.ascontiguousarray(unique), offsets
+
+
+def description_hash(description: Dict[str, Any]) -> str:
+    return hashlib.sha256(json.dumps(description, sort_keys=True).encode()).hexdigest()[:16]
+
+
+def _load_manifest(output_dir: Path) -> Optional[Dict[str, Any]]:
+    try:
+        with open(output_dir / 'manifest.json') as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return None
+
+
+def _remove_shard(output_dir: Path, name: str) -> None:
+    """Supprime un shard (dossier, ou fichiers .npz/.json de l'ancien format)"""
+    shutil.rmtree(output_dir / name, ignore_errors=True)
+    for suffix in ('.npz', '.json'):
+        (output_dir / f"{name}{suffix}").unlink(missing_ok=True)
+
+
+def _read_failure(font_path: Path, error: Exception) -> Dict[str, Any]:
+    """Résultat d'échec d'une police illisible, au format de _ingest_font"""
+    metrics = Instrumentation()
+    metrics.failure('ingest.read', font_path, error)
+    return {
+        'path': str(font_path),
+        'error': f"{type(error).__name__}: {error}",
+        'traceback': ''.join(traceback.format_exception(error)),
+        'metrics': metrics.snapshot(),
+    }
+
+
+def _source_entries(font_paths: List[Path], previous: Dict[str, Dict[str, Any]],
+                    descriptions: Dict[str, Dict], config: Dict[str, Any]
+                    ) -> Tuple[Dict[str, Dict[str, Any]], Dict[str, bytes], List[Dict[str, Any]]]:
+    """
+    Empreinte de chaque police : taille, date, SHA-256 et hash de description.
+
+    Seules les polices déjà ingérées dont la taille ou la date a changé sont
+    hashées avant la planification (pour distinguer une simple date d'un
+    contenu modifié) ; leurs octets sont gardés, dans la limite de
+    `prefetch_memory_mb`, pour ne pas les relire au traitement. Les polices
+    nouvelles gardent `sha256` à None : elles sont traitées de toute façon et
+    hashées depuis les octets lus pour leur traitement.
+
+    Returns:
+        (empreintes par chemin, octets déjà lus par chemin, échecs de lecture)
+    """
+    entries = {}
+    to_hash = []
+    for font_path in font_paths:
+        stat = os.stat(font_path)
+        entry = {'path': str(font_path), 'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns, 'sha256': None}
+        known = previous.get(str(font_path))
+        if known is not None and known['size'] == entry['size'] and known['mtime_ns'] == entry['mtime_ns']:
+            entry['sha256'] = known['sha256']
+        elif known is not None:
+            to_hash.append(font_path)
+        entry['description_hash'] = description_hash(descriptions.get(font_path.name, {'tags': []}))
+        entries[str(font_path)] = entry
+
+    budget = config.get('prefetch_memory_mb', 256) * 1024 * 1024
+    retained: Dict[str, bytes] = {}
+    failures = []
+    prefetcher = FontPrefetcher(to_hash, config.get('prefetch_concurrency', 8), config.get('prefetch_memory_mb', 256))
+    for font_path, data in prefetcher:
+        if isinstance(data, Exception):
+            failures.append(_read_failure(font_path, data))
+            continue
+        entries[str(font_path)]['sha256'] = hashlib.sha256(data).hexdigest()
+        if len(data) <= budget:
+            retained[str(font_path)] = data
+            budget -= len(data)
+    return entries, retained, failures
+
+
+def _plan(manifest: Optional[Dict[str, Any]], entries: Dict[str, Dict[str, Any]],
+          full: bool, code_version: str = CODE_VERSION) -> Tuple[List[str], List[str], List[str]]:
+    """
+    Compare les sources actuelles au manifeste précédent.
+
+    Un shard est conservé si toutes ses polices existent encore avec le même
+    contenu et que la version du code (charset compris) n'a pas changé ; sinon il est à
+    reconstruire et ses polices restantes sont retraitées.
+
+    Returns:
+        (shards conservés, shards à supprimer, chemins des polices à traiter)
+    """
+    if manifest is None:
+        return [], [], sorted(entries)
+    if full or manifest.get('code_version') != code_version or 'shard_sources' not in manifest:
+        return [], list(manifest.get('shards', [])), sorted(entries)
+
+    kept, stale, covered = [], [], set()
+    for name in manifest['shards']:
+        sources = manifest['shard_sources'][name]
+        if all(s['path'] in entries and entries[s['path']]['sha256'] == s['sha256'] for s in sources):
+            kept.append(name)
+            covered.update(s['path'] for s in sources)
+        else:
+            stale.append(name)
+    return kept, stale, sorted(path for path in entries if path not in covered)
+
+
+def _refresh_descriptions(output_dir: Path, name: str, sources: List[Dict[str, Any]],
+                          entries: Dict[str, Dict[str, Any]], descriptions: Dict[str, Dict]) -> int:
+    """Réécrit les descriptions périmées du fonts.json d'un shard conservé, sans toucher aux tableaux"""
+    changed = {s['path'] for s in sources if entries[s['path']]['description_hash'] != s['description_hash']}
+    if not changed:
+        return 0
+    with open(output_dir / name / 'fonts.json') as f:
+        fonts = json.load(f)
+    for font in fonts:
+        if font['path'] in changed:
+            font['description'] = descriptions.get(Path(font['path']).name, {'tags': []})
+    tmp_path = output_dir / name / 'fonts.json.tmp'
+    with open(tmp_path, 'w') as f:
+        json.dump(fonts, f)
+    os.replace(tmp_path, output_dir / name / 'fonts.json')
+    return len(changed)
+
+
+def ingest_split(font_dir: Path, output_dir: Path, config: Dict[str, Any], num_workers: int,
+                 full: bool = False) -> Dict[str, Any]:
+    """
+    Ingère les polices d'un dossier avec un pool de processus, en ne
+    retraitant que ce qui a changé depuis le dernier manifeste.
+
+    Args:
+        full: Ignore le manifeste précédent et reconstruit tous les shards
+
+    Returns:
+        Rapport de l'ingestion (shards écrits, polices traitées, réutilisées,
+        échecs, métriques agrégées des workers)
+    """
+    output_dir.mkdir(parents=True, exist_ok=True)
+    font_paths = sorted(p for p in font_dir.rglob("*") if p.suffix.lower() == '.ttf')
+    descriptions = load_font_descriptions()
+    start = time.perf_counter()
+
+    manifest = _load_manifest(output_dir)
+    charset = Charset.from_config(config.get('charset'))
+    # Changer de charset change le contenu des shards : tout est reconstruit
+    code_version = f"{CODE_VERSION}-charset-{charset.key}" if charset is not None else CODE_VERSION
+    previous_sources = {}
+    if not full and (manifest or {}).get('code_version') == code_version:
+        previous_sources = {s['path']: s for sources in manifest.get('shard_sources', {}).values()
+                            for s in sources}
+    entries, retained, read_failures = _source_entries(font_paths, previous_sources, descriptions, config)
+    kept, stale, to_process = _plan(manifest, entries, full, code_version)
+    unreadable = {failure['path'] for failure in read_failures}
+    to_process = [path for path in to_process if path not in unreadable]
+    # Octets hashés de polices dont le shard est conservé : inutiles au traitement
+    retained = {path: data for path, data in retained.items() if path in set(to_process)}
+
+    # Shards conservés : seules les descriptions modifiées sont réécrites
+    descriptions_updated = 0
+    for name in kept:
+        descriptions_updated += _refresh_descriptions(
+            output_dir, name, manifest['shard_sources'][name], entries, descriptions)
+
+    existing = [int(name.split('-')[1]) for name in (manifest or {}).get('shards', [])]
+    writer = ShardWriter(output_dir, config.get('shard_size', 256), start_index=max(existing, default=-1) + 1,
+                         charset=charset)
+    metrics = Instrumentation()
+    failures = []
+    for failure in read_failures:
+        metrics.merge(failure.pop('metrics'))
+        failures.append(failure)
+        logger.warning("Échec %s: %s", failure['path'], failure['error'])
+
+    if to_process:
+        with ProcessPoolExecutor(
+            max_workers=num_workers,
+            initializer=_init_worker,
+            initargs=(config.get('cache_dir'), config.get('cache_max_size_mb'), charset),
+        ) as executor:
+            def read(font_path: Path) -> bytes:
+                # Octets déjà lus pour le hash de planification : pas de seconde lecture
+                data = retained.pop(str(font_path), None)
+                return data if data is not None else read_bytes(font_path)
+
+            # Les octets des polices suivantes sont lus par des threads pendant que
+            # les workers analysent les précédentes depuis la mémoire
+            prefetcher = FontPrefetcher([Path(path) for path in to_process], config.get('prefetch_concurrency', 8),
+                                        config.get('prefetch_memory_mb', 256), reader=read)
+            in_flight = deque()
+            done = 0
+
+            def collect(result: Dict[str, Any]) -> None:
+                nonlocal done
+                done += 1
+                metrics.merge(result.pop('metrics', {}))
+                if 'error' in result:
+                    failures.append(result)
+                    logger.warning("[%d/%d] Échec %s: %s", done, len(prefetcher), result['path'], result['error'])
+                else:
+                    writer.add(result)
+
+            for font_path, data in prefetcher:
+                if isinstance(data, Exception):
+                    collect(_read_failure(font_path, data))
+                    continue
+                entry = entries[str(font_path)]
+                if entry['sha256'] is None:
+                    entry['sha256'] = hashlib.sha256(data).hexdigest()
+                in_flight.append(executor.submit(_ingest_font, font_path, data))
+                # Borne les octets en attente chez les workers ; les résultats restent dans l'ordre
+                while len(in_flight) >= 2 * num_workers:
+                    collect(in_flight.popleft().result())
+            while in_flight:
+                collect(in_flight.popleft().result())
+        writer.flush()
+
+    # Embeddings de style réémis (cache disque par contenu) si une description a changé
+    style_key = None
+    if config.get('cache_dir'):
+        style_key = (manifest or {}).get('style_key')
+        if descriptions_updated or to_process or style_key is None:
+            style_key = StyleEmbeddingTable(descriptions, dim=config.get('style_embedding_dim', 256),
+                                            cache_dir=Path(config['cache_dir'])).key
+
+    shard_sources = {name: [entries[s['path']] for s in manifest['shard_sources'][name]] for name in kept}
+    shard_sources.update({name: [entries[path] for path in info['paths']] for name, info in writer.shard_info.items()})
+    shard_stats = {name: manifest['shard_stats'][name] for name in kept}
+    shard_stats.update({name: {key: info[key] for key in ('glyphs', 'points', 'expanded_points')}
+                        for name, info in writer.shard_info.items()})
+    # Normalisation du corpus, recalculée sur les statistiques de toutes les polices des shards
+    font_stats = [np.load(output_dir / name / 'fonts.npy')['stats'] for name in kept + writer.shards]
+    normalization = corpus_statistics(np.concatenate(font_stats) if font_stats else np.zeros(0))
+
+    report = {
+        'font_dir': str(font_dir),
+        'fonts': len(font_paths),
+        'processed': len(to_process) + len(read_failures) - len(failures),
+        'reused': len(font_paths) - len(to_process) - len(read_failures),
+        'failed': len(failures),
+        'descriptions_updated': descriptions_updated,
+        'removed_shards': stale,
+        'format_version': SHARD_FORMAT_VERSION,
+        'code_version': code_version,
+        'charset': charset.describe() if charset is not None else None,
+        'style_key': style_key,
+        'normalization': normalization,
+        'shards': kept + writer.shards,
+        'shard_sources': shard_sources,
+        'shard_stats': shard_stats,
+        'glyphs': sum(stats['glyphs'] for stats in shard_stats.values()),
+        'points': sum(stats['points'] for stats in shard_stats.values()),
+        'expanded_points': sum(stats['expanded_points'] for stats in shard_stats.values()),
+        'failures': failures,
+        'seconds': time.perf_counter() - start,
+        'metrics': metrics.snapshot(),
+    }
+    # Le manifeste est remplacé avant la suppression des anciens shards
+    tmp_path = output_dir / 'manifest.json.tmp'
+    with open(tmp_path, 'w') as f:
+        json.dump(report, f, indent=2)
+    os.replace(tmp_path, output_dir / 'manifest.json')
+    for name in stale:
+        _remove_shard(output_dir, name)
+    return report
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Ingestion parallèle du corpus de polices")
+    parser.add_argument('--config', type=Path, default=Path('configs/data/default.yaml'))
+    parser.add_argument('--splits', nargs='+', default=['train', 'val'])
+    parser.add_argument('--workers', type=int, default=None, help="Remplace num_workers de la config")
+    parser.add_argument('--no-cache', action='store_true', help="Ignore le cache disque des polices")
+    parser.add_argument('--full', action='store_true', help="Reconstruit tous les shards sans réutiliser l'existant")
+    parser.add_argument('--metrics', type=Path, default=None, help="Fichier JSON Lines où ajouter les métriques")
+    parser.add_argument('--profile', type=Path, default=None, help="Active le profilage et écrit le rapport ici")
+    parser.add_argument('--profiler', choices=['cprofile', 'py-spy'], default='cprofile')
+    parser.add_argument('--log-level', default='INFO')
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=args.log_level.upper(), format='%(asctime)s %(levelname)s %(name)s %(message)s')
+
+    with open(args.config) as f:
+        config = yaml.safe_load(f)['data']
+    if args.no_cache:
+        config['cache_dir'] = None
+
+    num_workers = args.workers or config.get('num_workers', 1)
+    shards_dir = Path(config.get('shards_dir', 'data/shards'))
+
+    for split in args.splits:
+        font_dir = Path(config[f"{split}_dir"])
+        if not font_dir.exists():
+            print(f"Dossier absent, split ignoré : {font_dir}")
+            continue
+
+        # cProfile ne voit que le processus principal ; py-spy suit aussi les workers
+        profile_path = args.profile.with_name(f"{args.profile.stem}-{split}{args.profile.suffix}") if args.profile else None
+        with profile(profile_path, args.profiler):
+            report = ingest_split(font_dir, shards_dir / split, config, num_workers, full=args.full)
+
+        metrics = Instrumentation()
+        metrics.merge(report['metrics'])
+        metrics.log_summary(split=split)
+        if args.metrics:
+            metrics.export(args.metrics, split=split)
+        print(f"{split}: {report['processed']}/{report['fonts']} polices traitées, "
+              f"{report['reused']} réutilisées, {report['descriptions_updated']} descriptions mises à jour, "
+              f"{len(report['shards'])} shards, {report['failed']} échecs en {report['seconds']:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
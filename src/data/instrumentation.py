@@ -0,0 +1,199 @@
+# src/data/instrumentation.py
+"""
+Instrumentation du pipeline de données : timers par étape, compteurs,
+histogrammes et profilage optionnel, exportés en logs structurés.
+
+Les processeurs reçoivent une instance d'Instrumentation (l'instance globale
+par défaut) et la mettent à jour une fois par police ou par lot, jamais par
+glyphe, pour que le coût reste négligeable à l'échelle du corpus. Les
+échecs individuels ne sont journalisés qu'au niveau DEBUG.
+
+Usage :
+    from src.data.instrumentation import get_instrumentation
+    metrics = get_instrumentation()
+    with metrics.timer('tensor.convert'):
+        ...
+    metrics.count('tensor.glyphs.processed', 300)
+    metrics.observe('tensor.points_per_glyph', lengths)
+    metrics.log_summary()
+"""
+import cProfile
+import contextlib
+import json
+import logging
+import os
+import shutil
+import signal
+import subprocess
+import threading
+import time
+import numpy as np
+from collections import defaultdict
+from pathlib import Path
+from typing import Dict, Any, Iterable, Iterator, Optional, Union
+
+logger = logging.getLogger(__name__)
+
+
+class Instrumentation:
+    """
+    Collecte de métriques agrégables entre processus.
+
+    - timers : temps total et nombre d'appels par étape
+    - compteurs : entiers nommés (glyphes traités, ignorés, en échec...)
+    - histogrammes : comptes par puissance de 2 (bucket `2**k` = valeurs
+      dans ]2**(k-1), 2**k]), fusionnables sans conserver les valeurs
+
+    `snapshot()` renvoie un dict JSON-sérialisable ; `merge()` additionne un
+    snapshot venu d'un autre processus (workers d'ingestion par exemple).
+    """
+
+    def __init__(self, enabled: bool = True):
+        self.enabled = enabled
+        self._lock = threading.Lock()
+        self.reset()
+
+    def __getstate__(self) -> Dict[str, Any]:
+        # Le verrou et les defaultdict ne sont pas picklables (workers lancés en spawn)
+        return {'enabled': self.enabled, 'snapshot': self.snapshot()}
+
+    def __setstate__(self, state: Dict[str, Any]) -> None:
+        self.__init__(state['enabled'])
+        self.merge(state['snapshot'])
+
+    def reset(self) -> None:
+        with self._lock:
+            self.timers: Dict[str, Dict[str, float]] = defaultdict(lambda: {'seconds': 0.0, 'calls': 0})
+            self.counters: Dict[str, int] = defaultdict(int)
+            self.histograms: Dict[str, Dict[int, int]] = defaultdict(lambda: defaultdict(int))
+
+    @contextlib.contextmanager
+    def timer(self, stage: str) -> Iterator[None]:
+        """Chronomètre un bloc et l'ajoute au total de l'étape"""
+        if not self.enabled:
+            yield
+            return
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            with self._lock:
+                timer = self.timers[stage]
+                timer['seconds'] += elapsed
+                timer['calls'] += 1
+
+    def count(self, name: str, value: int = 1) -> None:
+        if not self.enabled or not value:
+            return
+        with self._lock:
+            self.counters[name] += int(value)
+
+    def observe(self, name: str, values: Union[int, float, Iterable, np.ndarray]) -> None:
+        """Ajoute une ou plusieurs valeurs positives à un histogramme, en un seul appel vectorisé"""
+        if not self.enabled:
+            return
+        values = np.asarray(values, dtype=np.float64).reshape(-1)
+        if values.size == 0:
+            return
+        # Plus petite puissance de 2 >= valeur (0 et 1 tombent dans le bucket 1)
+        exponents = np.ceil(np.log2(np.maximum(values, 1.0))).astype(np.int64)
+        buckets, counts = np.unique(exponents, return_counts=True)
+        with self._lock:
+            histogram = self.histograms[name]
+            for exponent, count in zip(buckets.tolist(), counts.tolist()):
+                histogram[2 ** exponent] += count
+
+    def failure(self, stage: str, item: Any, error: BaseException) -> None:
+        """Compte un échec par étape et par type d'exception ; détail au niveau DEBUG"""
+        self.count(f"{stage}.failed")
+        self.count(f"{stage}.errors.{type(error).__name__}")
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug(json.dumps({'event': 'failure', 'stage': stage, 'item': str(item),
+                                     'error': f"{type(error).__name__}: {error}"}))
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                'timers': {stage: dict(timer) for stage, timer in self.timers.items()},
+                'counters': dict(self.counters),
+                'histograms': {name: {str(bucket): count for bucket, count in sorted(histogram.items())}
+                               for name, histogram in self.histograms.items()},
+            }
+
+    def merge(self, snapshot: Dict[str, Any]) -> None:
+        """Additionne un snapshot (d'un worker par exemple) aux métriques courantes"""
+        with self._lock:
+            for stage, timer in snapshot.get('timers', {}).items():
+                self.timers[stage]['seconds'] += timer['seconds']
+                self.timers[stage]['calls'] += timer['calls']
+            for name, value in snapshot.get('counters', {}).items():
+                self.counters[name] += value
+            for name, histogram in snapshot.get('histograms', {}).items():
+                for bucket, count in histogram.items():
+                    self.histograms[name][int(bucket)] += count
+
+    def log_summary(self, level: int = logging.INFO, **context) -> None:
+        """Émet le snapshot sous forme d'une ligne de log JSON"""
+        logger.log(level, json.dumps({'event': 'metrics', **context, **self.snapshot()}))
+
+    def export(self, path: Path, **context) -> None:
+        """Ajoute le snapshot horodaté à un fichier JSON Lines"""
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with open(path, 'a') as f:
+            f.write(json.dumps({'timestamp': time.time(), **context, **self.snapshot()}) + '\n')
+
+
+@contextlib.contextmanager
+def profile(output: Optional[Path], tool: str = 'cprofile') -> Iterator[None]:
+    """
+    Profile un bloc de code.
+
+    Args:
+        output: Fichier de sortie (.prof pour cProfile, .svg/.speedscope pour
+            py-spy) ; None désactive le profilage
+        tool: 'cprofile' (processus courant uniquement) ou 'py-spy' (échantillonnage
+            externe, sous-processus compris ; nécessite py-spy dans le PATH)
+    """
+    if output is None:
+        yield
+        return
+
+    output = Path(output)
+    output.parent.mkdir(parents=True, exist_ok=True)
+
+    if tool == 'cprofile':
+        profiler = cProfile.Profile()
+        profiler.enable()
+        try:
+            yield
+        finally:
+            profiler.disable()
+            profiler.dump_stats(output)
+            logger.info(json.dumps({'event': 'profile', 'tool': tool, 'output': str(output)}))
+        return
+
+    if tool != 'py-spy':
+        raise ValueError(f"Profileur inconnu: {tool}")
+    executable = shutil.which('py-spy')
+    if executable is None:
+        raise RuntimeError("py-spy est introuvable dans le PATH")
+
+    process = subprocess.Popen([executable, 'record', '--pid', str(os.getpid()), '--subprocesses',
+                                '--output', str(output)])
+    try:
+        yield
+    finally:
+        # py-spy écrit son rapport à la réception de SIGINT
+        process.send_signal(signal.SIGINT)
+        process.wait()
+        logger.info(json.dumps({'event': 'profile', 'tool': tool, 'output': str(output)}))
+
+
+# Instance partagée par défaut par les processeurs d'un même processus
+_default = Instrumentation()
+
+
+def get_instrumentation() -> Instrumentation:
+    return _default
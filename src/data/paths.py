@@ -0,0 +1,11 @@
+# src/data/paths.py
+"""
+Chemins des fichiers de configuration livrés avec le dépôt.
+
+Résolus depuis l'emplacement du paquet et non depuis le dossier courant, pour
+que les modules fonctionnent quel que soit l'endroit d'où ils sont lancés.
+"""
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).resolve().parents[2]
+DATA_CONFIG_DIR = REPO_ROOT / 'configs' / 'data'
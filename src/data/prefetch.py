@@ -0,0 +1,84 @@
+# src/data/prefetch.py
+"""
+Lecture anticipée des fichiers de polices.
+
+Les octets des polices suivantes sont lus par un pool de threads pendant que
+les polices courantes sont analysées, ce qui masque la latence d'un volume
+réseau derrière le travail CPU. Le volume lu d'avance est borné par un budget
+mémoire et le nombre de lectures simultanées par `max_concurrency`.
+"""
+import time
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from pathlib import Path
+from typing import Callable, Deque, Iterable, Iterator, Tuple, Union
+
+
+def read_bytes(font_path: Path) -> bytes:
+    with open(font_path, 'rb') as f:
+        return f.read()
+
+
+def throttled_reader(megabytes_per_second: float, latency_ms: float = 0.0) -> Callable[[Path], bytes]:
+    """Lecteur qui simule un volume lent (débit et latence par fichier), pour les tests et benchmarks"""
+    def read(font_path: Path) -> bytes:
+        data = read_bytes(font_path)
+        time.sleep(latency_ms / 1000.0 + len(data) / (megabytes_per_second * 1024 * 1024))
+        return data
+    return read
+
+
+class FontPrefetcher:
+    """
+    Itère sur (chemin, octets) dans l'ordre des chemins, en lisant d'avance.
+
+    Une lecture en échec est renvoyée sous la forme (chemin, exception) pour
+    que l'appelant la compte comme un échec sans interrompre l'itération.
+    """
+
+    def __init__(self, font_paths: Iterable[Path], max_concurrency: int = 8, memory_budget_mb: float = 256,
+                 reader: Callable[[Path], bytes] = read_bytes):
+        """
+        Args:
+            font_paths: Polices à lire
+            max_concurrency: Nombre de lectures simultanées
+            memory_budget_mb: Octets lus d'avance et pas encore consommés au-delà
+                desquels aucune nouvelle lecture n'est lancée
+            reader: Fonction de lecture (remplaçable, ex. throttled_reader)
+        """
+        self.font_paths = [Path(p) for p in font_paths]
+        self.max_concurrency = max(1, max_concurrency)
+        self.memory_budget = int(memory_budget_mb * 1024 * 1024)
+        self.reader = reader
+
+    def __len__(self) -> int:
+        return len(self.font_paths)
+
+    def __iter__(self) -> Iterator[Tuple[Path, Union[bytes, Exception]]]:
+        pending: Deque[Tuple[Path, Future]] = deque()
+        paths = iter(self.font_paths)
+
+        with ThreadPoolExecutor(max_workers=self.max_concurrency, thread_name_prefix='font-prefetch') as executor:
+            def buffered() -> int:
+                # Seules les lectures terminées comptent : leur taille est alors connue
+                return sum(len(future.result()) for _, future in pending
+                           if future.done() and future.exception() is None)
+
+            def fill() -> None:
+                # Toujours au moins une lecture en cours, puis tant que le budget le permet
+                while len(pending) < 2 * self.max_concurrency and (not pending or buffered() < self.memory_budget):
+                    font_path = next(paths, None)
+                    if font_path is None:
+                        return
+                    pending.append((font_path, executor.submit(self.reader, font_path)))
+
+            fill()
+            while pending:
+                font_path, future = pending.popleft()
+                try:
+                    data: Union[bytes, Exception] = future.result()
+                except Exception as e:
+                    data = e
+                fill()
+                yield font_path, data
+
@@ -0,0 +1,189 @@
+# src/data/processors/bezier_resampler.py
+import numpy as np
+import torch
+from typing import Dict, Any, Optional, Tuple
+
+from src.data.processors.glyph_processor import GlyphProcessor, LINE, CURVE, QCURVE
+
+class BezierResampler:
+    """
+    Rééchantillonne chaque contour en un nombre fixe d'éléments.
+
+    Toutes les lignes, quadratiques et cubiques d'une police sont mises sous
+    forme cubique (élévation de degré exacte), évaluées ensemble, puis chaque
+    contour est rééchantillonné uniformément en abscisse curviligne. Les
+    sorties ont une forme fixe par contour : pas de padding sur les points.
+    """
+
+    def __init__(self, num_samples: int = 64, num_segments: Optional[int] = None,
+                 subdivisions: int = 16, scale: float = 1.0):
+        """
+        Args:
+            num_samples: Nombre de points par contour (mode points)
+            num_segments: Si fourni, produit ce nombre de cubiques par contour
+                au lieu de points
+            subdivisions: Nombre de cordes par segment pour mesurer les longueurs
+            scale: Diviseur appliqué aux coordonnées (1 : unités de la police,
+                comme TensorProcessor)
+        """
+        self.num_samples = num_samples
+        self.num_segments = num_segments
+        self.subdivisions = subdivisions
+        self.scale = scale
+        self.glyph_processor = GlyphProcessor()
+
+    def resample_font(self, font_data: Dict[str, Any]) -> Dict[str, Any]:
+        """Rééchantillonne tous les glyphes d'une police depuis FontProcessor"""
+        return self.resample_columns(self.glyph_processor.process_font_glyphs(font_data['glyph_set']))
+
+    def resample_columns(self, columns: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Rééchantillonne des résultats de process_font_glyphs.
+
+        Returns:
+            Dict avec `samples` (C, num_samples, 2) ou `cubics`
+            (C, num_segments, 4, 2), `contour_lengths` (C,),
+            `glyph_contour_offsets` (G + 1,) et `names`
+        """
+        segments, segment_contours = self._to_cubic_segments(columns)
+        num_contours = len(columns['contour_offsets']) - 1
+
+        if self.num_segments is None:
+            samples, lengths = self._sample_uniform(segments, segment_contours, num_contours, self.num_samples)
+            result = {'samples': samples / self.scale}
+        else:
+            # 3 échantillons par cubique : l'ancre et les points à t = 1/3 et 2/3
+            samples, lengths = self._sample_uniform(segments, segment_contours, num_contours, 3 * self.num_segments)
+            result = {'cubics': self._fit_cubics(samples) / self.scale}
+
+        result.update({
+            'contour_lengths': lengths / self.scale,
+            'glyph_contour_offsets': columns['glyph_contour_offsets'],
+            'names': columns['names'],
+        })
+        return result
+
+    def _to_cubic_segments(self, columns: Dict[str, Any]) -> Tuple[np.ndarray, np.ndarray]:
+        """Tous les segments de la police en cubiques (S, 4, 2), dans l'ordre des contours"""
+        coords = columns['coordinates'].astype(np.float64)
+        types = columns['point_types']
+        contour_offsets = columns['contour_offsets']
+
+        def elevate_line(p0, p1):
+            return np.stack([p0, p0 + (p1 - p0) / 3, p0 + 2 * (p1 - p0) / 3, p1], axis=1)
+
+        line_end = np.flatnonzero(types == LINE)
+        lines = elevate_line(coords[line_end - 1], coords[line_end])
+
+        cubic_end = np.flatnonzero(types == CURVE)
+        cubics = np.stack([coords[cubic_end - k] for k in (3, 2, 1, 0)], axis=1)
+
+        quad_end = np.flatnonzero(types == QCURVE)
+        q0, q1, q2 = (coords[quad_end - k] for k in (2, 1, 0))
+        quads = np.stack([q0, q0 + 2 / 3 * (q1 - q0), q2 + 2 / 3 * (q1 - q2), q2], axis=1)
+
+        # Segment de fermeture de chaque contour, trié juste après son dernier point
+        starts, ends = contour_offsets[:-1], contour_offsets[1:]
+        closing = elevate_line(coords[ends - 1], coords[starts])
+
+        keys = np.concatenate([line_end, cubic_end, quad_end, ends - 0.5])
+        order = np.argsort(keys, kind='stable')
+        segments = np.concatenate([lines, cubics, quads, closing])[order]
+        point_index = np.floor(keys[order]).astype(np.int64)
+        segment_contours = np.searchsorted(contour_offsets, point_index, side='right') - 1
+        return segments, segment_contours
+
+    def _sample_uniform(self, segments: np.ndarray, segment_contours: np.ndarray,
+                        num_contours: int, count: int) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Échantillonne `count` points par contour, uniformément en longueur.
+
+        Les segments sont évalués en `subdivisions` cordes ; une seule
+        recherche dans la longueur cumulée de toute la police place les
+        échantillons de tous les contours.
+        """
+        t = np.linspace(0.0, 1.0, self.subdivisions + 1)[None, :, None]
+        mt = 1.0 - t
+        p0, p1, p2, p3 = (segments[:, None, k] for k in range(4))
+        dense = mt ** 3 * p0 + 3 * mt ** 2 * t * p1 + 3 * mt * t ** 2 * p2 + t ** 3 * p3
+
+        chord_start = dense[:, :-1].reshape(-1, 2)
+        chord_vec = (dense[:, 1:] - dense[:, :-1]).reshape(-1, 2)
+        chord_length = np.hypot(chord_vec[:, 0], chord_vec[:, 1])
+        cumulative = np.concatenate([[0.0], np.cumsum(chord_length)])
+
+        segments_per_contour = np.bincount(segment_contours, minlength=num_contours)
+        chord_offsets = np.concatenate([[0], np.cumsum(segments_per_contour)]) * self.subdivisions
+        contour_start = cumulative[chord_offsets[:-1]]
+        lengths = cumulative[chord_offsets[1:]] - contour_start
+
+        targets = contour_start[:, None] + lengths[:, None] * (np.arange(count) / count)[None, :]
+        chord = np.searchsorted(cumulative, targets, side='right') - 1
+        chord = np.clip(chord, chord_offsets[:-1, None], np.maximum(chord_offsets[1:, None] - 1, chord_offsets[:-1, None]))
+        chord = np.minimum(chord, len(chord_length) - 1)
+
+        if len(chord_length) == 0:
+            return np.zeros((num_contours, count, 2), dtype=np.float32), lengths.astype(np.float32)
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            fraction = np.where(chord_length[chord] > 0, (targets - cumulative[chord]) / chord_length[chord], 0.0)
+        samples = chord_start[chord] + np.clip(fraction, 0.0, 1.0)[..., None] * chord_vec[chord]
+        return samples.astype(np.float32), lengths.astype(np.float32)
+
+    def _fit_cubics(self, samples: np.ndarray) -> np.ndarray:
+        """
+        Cubiques passant par les échantillons : chaque groupe de 3 donne l'ancre
+        et les points à t = 1/3 et 2/3, l'ancre suivante ferme la courbe.
+        """
+        groups = samples.reshape(samples.shape[0], -1, 3, 2)
+        a0, q1, q2 = groups[:, :, 0], groups[:, :, 1], groups[:, :, 2]
+        a3 = np.roll(a0, -1, axis=1)
+
+        # B(1/3) et B(2/3) imposés : système linéaire 2x2 résolu en forme close
+        r1 = 27 * q1 - 8 * a0 - a3
+        r2 = 27 * q2 - a0 - 8 * a3
+        c1 = (2 * r1 - r2) / 18
+        c2 = (2 * r2 - r1) / 18
+        return np.stack([a0, c1, c2, a3], axis=2)
+
+    @staticmethod
+    def to_dense(result: Dict[str, Any], max_contours: Optional[int] = None) -> Dict[str, torch.Tensor]:
+        """
+        Range les contours par glyphe en un tenseur de forme statique.
+
+        Returns:
+            Dict avec `contours` (G, max_contours, ...) et `contour_mask` (G, max_contours)
+        """
+        values = result['samples'] if 'samples' in result else result['cubics']
+        offsets = result['glyph_contour_offsets']
+        counts = np.diff(offsets)
+        if max_contours is None:
+            max_contours = int(counts.max()) if len(counts) else 0
+
+        glyph_of_contour = np.repeat(np.arange(len(counts)), counts)
+        rank = np.arange(len(values)) - offsets[glyph_of_contour]
+        keep = rank < max_contours
+
+        dense = np.zeros((len(counts), max_contours) + values.shape[1:], dtype=np.float32)
+        dense[glyph_of_contour[keep], rank[keep]] = values[keep]
+        mask = np.arange(max_contours)[None, :] < counts[:, None]
+        return {'contours': torch.from_numpy(dense), 'contour_mask': torch.from_numpy(mask)}
+
+
+if __name__ == "__main__":
+    # Test du rééchantillonnage
+    import time
+    from pathlib import Path
+    from src.data.processors.font_processor import FontProcessor
+
+    font_path = Path("data/fonts/train/RethinkSans-VariableFont_wght.ttf")
+
+    if font_path.exists():
+        font_data = FontProcessor().process_font(font_path)
+
+        for resampler in (BezierResampler(num_samples=64), BezierResampler(num_segments=16)):
+            start = time.perf_counter()
+            result = resampler.resample_font(font_data)
+            dense = BezierResampler.to_dense(result, max_contours=4)
+            elapsed = (time.perf_counter() - start) * 1000
+            print(f"{len(result['names'])} glyphes -> {tuple(dense['contours'].shape)} en {elapsed:.1f} ms")
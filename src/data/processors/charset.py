@@ -0,0 +1,98 @@
+# src/data/processors/charset.py
+import hashlib
+import numpy as np
+import yaml
+from fontTools.ttLib import TTFont
+from pathlib import Path
+from typing import Dict, Any, List, Optional, Tuple, Union
+
+from src.data.paths import DATA_CONFIG_DIR
+
+CHARSETS_PATH = DATA_CONFIG_DIR / 'charsets.yaml'
+
+class Charset:
+    """
+    Ensemble ordonné de codepoints Unicode à extraire de chaque police.
+
+    Avec un Charset, TensorProcessor ne traite que les glyphes associés à ces
+    codepoints par la cmap, dans l'ordre croissant des codepoints : la ligne
+    i du tenseur de chaque police est toujours le même caractère, et un
+    masque de présence indique les caractères absents de la police.
+    """
+
+    def __init__(self, codepoints: List[int], name: Optional[str] = None):
+        self.codepoints = np.unique(np.asarray(codepoints, dtype=np.int64))
+        self.name = name or 'custom'
+        # Identifie le contenu du charset (clés de cache, version des shards)
+        self.key = hashlib.sha256(self.codepoints.tobytes()).hexdigest()[:12]
+
+    def __len__(self) -> int:
+        return len(self.codepoints)
+
+    @classmethod
+    def from_config(cls, spec: Union[None, str, List[Any], Dict[str, Any]],
+                    path: Path = CHARSETS_PATH) -> Optional['Charset']:
+        """
+        Charset décrit par la config de données.
+
+        Args:
+            spec: None (tous les glyphes, pas de Charset), nom d'un charset de
+                `path`, liste de codepoints ou de caractères, ou dict avec
+                `ranges` et/ou `chars`
+        """
+        if spec is None:
+            return None
+        if isinstance(spec, str):
+            with open(path) as f:
+                charsets = yaml.safe_load(f)['charsets']
+            if spec not in charsets:
+                raise ValueError(f"Charset inconnu: {spec} (disponibles : {', '.join(sorted(charsets))})")
+            return cls(cls._parse(charsets[spec]), name=spec)
+        if isinstance(spec, dict):
+            return cls(cls._parse(spec))
+        return cls([ord(c) if isinstance(c, str) else int(c) for c in spec])
+
+    @staticmethod
+    def _parse(entry: Dict[str, Any]) -> List[int]:
+        codepoints = [ord(c) for c in entry.get('chars', '')]
+        for start, end in entry.get('ranges', []):
+            codepoints.extend(range(int(start), int(end) + 1))
+        return codepoints
+
+    def select(self, font: TTFont) -> Tuple[List[Optional[str]], np.ndarray]:
+        """
+        Glyphes de la police pour chaque codepoint du charset.
+
+        La cmap est indexée une fois par police en tableaux triés, puis tous
+        les codepoints sont cherchés en un seul np.searchsorted.
+
+        Returns:
+            Tuple (nom du glyphe ou None pour chaque codepoint, masque de
+            présence (len(charset),) bool)
+        """
+        cmap = font.getBestCmap() or {}
+        if not cmap:
+            return [None] * len(self), np.zeros(len(self), dtype=bool)
+        keys = np.fromiter(cmap.keys(), dtype=np.int64, count=len(cmap))
+        names = np.array(list(cmap.values()), dtype=object)
+        order = np.argsort(keys)
+        keys, names = keys[order], names[order]
+
+        positions = np.minimum(np.searchsorted(keys, self.codepoints), len(keys) - 1)
+        present = keys[positions] == self.codepoints
+        glyph_names = [name if ok else None for name, ok in zip(names[positions].tolist(), present.tolist())]
+        return glyph_names, present
+
+    def describe(self) -> Dict[str, Any]:
+        """Résumé JSON-sérialisable (manifeste des shards)"""
+        return {'name': self.name, 'key': self.key, 'codepoints': self.codepoints.tolist()}
+
+
+if __name__ == "__main__":
+    # Test de la sélection sur les polices d'entraînement
+    charset = Charset.from_config('latin-1')
+    print(f"Charset {charset.name} ({charset.key}) : {len(charset)} codepoints")
+    for font_path in sorted(Path("data/fonts/train").glob("*.ttf")):
+        glyph_names, present = charset.select(TTFont(font_path))
+        missing = ''.join(chr(c) for c in charset.codepoints[~present])
+        print(f"{font_path.name}: {present.sum()}/{len(charset)} présents, absents : {missing!r}")
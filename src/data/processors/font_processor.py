@@ -1,38 +1,90 @@
 # src/data/processors/font_processor.py
+import functools
+import io
+import os
 import yaml
 from fontTools import ttLib
 from pathlib import Path
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Optional
+
+from src.data.paths import DATA_CONFIG_DIR
+
+DESCRIPTIONS_PATH = DATA_CONFIG_DIR / 'font_descriptions.yaml'
+
+
+def load_font_descriptions(path: Path = DESCRIPTIONS_PATH) -> Dict[str, Dict]:
+    """
+    Descriptions des polices, relues seulement si le fichier a changé.
+
+    Le YAML est parsé une fois par processus et par version du fichier
+    (date de modification), au lieu d'une fois par FontProcessor.
+    """
+    try:
+        mtime = os.stat(path).st_mtime_ns
+    except FileNotFoundError:
+        return {}
+    return _parse_font_descriptions(str(Path(path).resolve()), mtime)
+
+
+@functools.lru_cache(maxsize=8)
+def _parse_font_descriptions(path: str, mtime: int) -> Dict[str, Dict]:
+    try:
+        with open(path) as f:
+            return yaml.safe_load(f)['fonts'] or {}
+    except (FileNotFoundError, KeyError, TypeError):
+        return {}
+
 
 class FontProcessor:
 
-    def __init__(self):
+    def __init__(self, descriptions_path: Path = DESCRIPTIONS_PATH):
         self.supported_formats = ['.ttf']
-        try:
-            with open('configs/data/font_descriptions.yaml') as f:
-                self.font_descriptions = yaml.safe_load(f)['fonts']
-        except (FileNotFoundError, KeyError):
-            self.font_descriptions = {}
+        self.font_descriptions = load_font_descriptions(descriptions_path)
 
 
 
-    def process_font(self, font_path: Path) -> Dict[str, Any]:
+    def process_font(self, font_path: Path, metadata_only: bool = False,
+                     data: Optional[bytes] = None) -> Dict[str, Any]:
+        """
+        Charge une police et en extrait les métadonnées.
+
+        Args:
+            font_path: Chemin de la police
+            metadata_only: Ouvre la police en mode lazy et ne lit que les tables
+                name, head, hhea, OS/2 et fvar, sans construire de glyph set.
+                Les glyphes restent accessibles à la demande via get_glyph.
+            data: Contenu du fichier déjà lu (voir src.data.prefetch) ; la
+                police est alors analysée depuis la mémoire sans relire le disque
+
+        Returns:
+            Dict contenant la police, ses métadonnées, sa description, ses axes
+            et instances, et son glyph set (sauf en mode metadata_only)
+        """
         if font_path.suffix not in self.supported_formats:
             raise ValueError(f"Format non supporté: {font_path.suffix}")
 
         try:
-            font = ttLib.TTFont(font_path)
+            source = io.BytesIO(data) if data is not None else font_path
+            font = ttLib.TTFont(source, lazy=metadata_only or None)
         except Exception as e:
             raise Exception(f"Erreur lors du chargement de {font_path}: {str(e)}")
 
-        return {
+        font_data = {
             'font': font,
             'metadata': self._extract_metadata(font),
             'description': self._get_font_description(font_path.name),
             'variation_axes': self._extract_variation_axes(font),
             'instances': self._extract_instances(font),
-            'glyph_set': font.getGlyphSet()
         }
+        if not metadata_only:
+            font_data['glyph_set'] = font.getGlyphSet()
+        return font_data
+
+    def get_glyph(self, font_data: Dict[str, Any], glyph_name: str):
+        """Renvoie un glyphe, en créant le glyph set à la première demande"""
+        if 'glyph_set' not in font_data:
+            font_data['glyph_set'] = font_data['font'].getGlyphSet()
+        return font_data['glyph_set'][glyph_name]
 
     def _extract_metadata(self, font: ttLib.TTFont) -> Dict[str, Any]:
         return {
@@ -0,0 +1,210 @@
+# src/data/processors/font_writer.py
+"""
+Écriture de polices TTF à partir de tenseurs de glyphes (inverse de TensorProcessor).
+
+Usage :
+    python -m src.data.processors.font_writer --template data/fonts/train/RethinkSans-VariableFont_wght.ttf \\
+        --inputs generated/*.pt --output-dir exports/ --normalization data/shards/train/manifest.json
+"""
+import argparse
+import json
+import numpy as np
+import torch
+from concurrent.futures import ProcessPoolExecutor
+from fontTools.ttLib import TTFont
+from fontTools.ttLib.tables import ttProgram
+from fontTools.ttLib.tables._g_l_y_f import Glyph, GlyphCoordinates
+from pathlib import Path
+from typing import Dict, Any, Iterable, List, Optional, Tuple
+
+from src.data.processors.charset import Charset
+from src.data.processors.font_processor import FontProcessor
+from src.data.processors.normalization import GlyphNormalizer
+
+# Tables invalidées par de nouveaux contours dans une police variable
+VARIATION_TABLES = ('fvar', 'gvar', 'avar', 'cvar', 'HVAR', 'VVAR', 'MVAR', 'STAT')
+
+class FontWriter:
+    """
+    Reconstruit une police à partir de tenseurs (num_glyphs, max_points, 2).
+
+    Les glyphes sont dans l'ordre de TensorProcessor (glyphes non vides de la
+    table glyf, composites compris, ou caractères du charset). La structure des contours (fins de
+    contours, points on/off-curve) est reprise du glyphe correspondant de la
+    police modèle, composites aplatis, quand le nombre de points concorde ;
+    sinon le glyphe devient un contour unique de points on-curve. Les
+    composites sont écrits comme glyphes simples. hmtx, cmap, name, etc. sont
+    copiés du modèle ; les caractères du charset absents du modèle ne sont pas
+    écrits.
+    """
+
+    def __init__(self, template_path: Path, normalization: Optional[Dict[str, Any]] = None,
+                 charset: Optional[Charset] = None):
+        """
+        Args:
+            template_path: Police modèle
+            normalization: Statistiques de corpus ayant servi à normaliser les
+                glyphes (`normalization` du manifeste des shards) ; sans elles,
+                les glyphes sont supposés en em
+            charset: Charset avec lequel les glyphes ont été produits
+        """
+        self.template_path = Path(template_path)
+        self.normalization = normalization
+
+        template = TTFont(self.template_path)
+        self.metadata = FontProcessor()._extract_metadata(template)
+
+        # Même sélection de glyphes que TensorProcessor._convert_glyphs_to_tensor
+        glyf_table = template['glyf']
+        self.glyph_names: List[Optional[str]] = []
+        self.structures: List[Tuple[List[int], bytes]] = []
+        selected = charset.select(template)[0] if charset is not None else glyf_table.glyphs
+        for glyph_name in selected:
+            coordinates = []
+            if glyph_name is not None and glyf_table[glyph_name].numberOfContours != 0:
+                coordinates, end_pts, flags = glyf_table[glyph_name].getCoordinates(glyf_table)
+            if len(coordinates) > 0:
+                self.glyph_names.append(glyph_name)
+                self.structures.append((list(end_pts), bytes(flags)))
+            elif charset is not None:
+                # Ligne alignée sur le charset : caractère absent ou glyphe vide
+                self.glyph_names.append(glyph_name)
+                self.structures.append(([], b''))
+        template.close()
+
+    def _denormalize_points(self, points: np.ndarray) -> np.ndarray:
+        """Ramène des points normalisés en unités de la police modèle, arrondis à l'entier"""
+        return np.rint(GlyphNormalizer.denormalize(points, self.metadata['units_per_em'],
+                                                   self.normalization)).astype(np.int32)
+
+    def _build_glyph(self, points: np.ndarray, index: int) -> Glyph:
+        end_pts, flags = self.structures[index]
+        if len(points) != len(flags):
+            # Structure inconnue : un seul contour de points on-curve
+            end_pts, flags = [len(points) - 1], bytes([1]) * len(points)
+
+        glyph = Glyph()
+        glyph.numberOfContours = len(end_pts)
+        glyph.endPtsOfContours = end_pts
+        glyph.flags = bytearray(b & 1 for b in flags)
+        glyph.coordinates = GlyphCoordinates(points.tolist())
+        # Les instructions du modèle ne correspondent plus aux nouveaux points
+        glyph.program = ttProgram.Program()
+        glyph.program.fromBytecode(b'')
+        return glyph
+
+    def write(self, batches: Iterable[Tuple[torch.Tensor, torch.Tensor]], output_path: Path,
+              family_name: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Écrit une police en consommant les glyphes batch par batch.
+
+        Chaque glyphe est compacté en octets dès sa construction, de sorte que
+        seule la représentation binaire de la police reste en mémoire.
+
+        Args:
+            batches: Itérable de (glyphes (B, max_points, 2), longueurs (B,))
+            output_path: Fichier TTF à écrire
+            family_name: Nouveau nom de famille (name IDs 1, 4, 6 et 16)
+
+        Returns:
+            Rapport avec le nombre de glyphes remplacés et restructurés
+        """
+        font = TTFont(self.template_path)
+        for tag in VARIATION_TABLES:
+            if tag in font:
+                del font[tag]
+
+        glyf_table = font['glyf']
+        hmtx = font['hmtx']
+        written = 0
+        restructured = 0
+
+        for glyphs, lengths in batches:
+            glyphs = self._denormalize_points(glyphs.detach().cpu().numpy())
+            for points, length in zip(glyphs, lengths.tolist()):
+                if written >= len(self.glyph_names):
+                    raise ValueError(f"Plus de glyphes que la police modèle n'en contient ({len(self.glyph_names)})")
+                name = self.glyph_names[written]
+                if length == 0 or name is None:
+                    written += 1
+                    continue
+                glyph = self._build_glyph(points[:length], written)
+                restructured += len(glyph.flags) != len(self.structures[written][1])
+
+                glyph.recalcBounds(glyf_table)
+                advance, _ = hmtx[name]
+                hmtx[name] = (advance, glyph.xMin)
+                glyph.compact(glyf_table, recalcBBoxes=False)
+                glyf_table[name] = glyph
+                written += 1
+
+        if family_name:
+            self._rename(font, family_name)
+        output_path.parent.mkdir(parents=True, exist_ok=True)
+        font.save(output_path)
+        font.close()
+        return {'output': str(output_path), 'glyphs': written, 'restructured': restructured}
+
+    def _rename(self, font: TTFont, family_name: str) -> None:
+        name_table = font['name']
+        subfamily = name_table.getDebugName(2) or 'Regular'
+        name_table.setName(family_name, 1, 3, 1, 0x409)
+        name_table.setName(family_name, 16, 3, 1, 0x409)
+        name_table.setName(f"{family_name} {subfamily}", 4, 3, 1, 0x409)
+        name_table.setName(f"{family_name}-{subfamily}".replace(' ', ''), 6, 3, 1, 0x409)
+
+
+def iter_batches(glyphs: torch.Tensor, lengths: torch.Tensor, batch_size: int = 256):
+    """Découpe des tenseurs déjà en mémoire en batches pour FontWriter.write"""
+    for start in range(0, len(lengths), batch_size):
+        yield glyphs[start:start + batch_size], lengths[start:start + batch_size]
+
+
+def _export_file(template_path: Path, input_path: Path, output_dir: Path,
+                 normalization: Optional[Dict[str, Any]] = None, charset: Optional[Charset] = None) -> Dict[str, Any]:
+    """Worker : exporte un fichier .pt ({'glyphs', 'glyph_lengths'}) en TTF"""
+    try:
+        # mmap évite de charger tout le fichier avant le découpage en batches
+        data = torch.load(input_path, map_location='cpu', mmap=True)
+        writer = FontWriter(template_path, normalization, charset)
+        return writer.write(
+            iter_batches(data['glyphs'], data['glyph_lengths']),
+            output_dir / f"{input_path.stem}.ttf",
+            family_name=data.get('family_name'))
+    except Exception as e:
+        return {'input': str(input_path), 'error': f"{type(e).__name__}: {e}"}
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Export de tenseurs de glyphes en TTF")
+    parser.add_argument('--template', type=Path, required=True)
+    parser.add_argument('--inputs', type=Path, nargs='+', required=True)
+    parser.add_argument('--output-dir', type=Path, required=True)
+    parser.add_argument('--workers', type=int, default=1)
+    parser.add_argument('--normalization', type=Path, default=None,
+                        help="Manifeste des shards dont reprendre la normalisation du corpus et le charset")
+    args = parser.parse_args(argv)
+
+    normalization = None
+    charset = None
+    if args.normalization:
+        with open(args.normalization) as f:
+            manifest = json.load(f)
+        normalization = manifest['normalization']
+        if manifest.get('charset'):
+            charset = Charset(manifest['charset']['codepoints'], name=manifest['charset']['name'])
+
+    with ProcessPoolExecutor(max_workers=args.workers) as executor:
+        results = list(executor.map(
+            _export_file,
+            [args.template] * len(args.inputs), args.inputs, [args.output_dir] * len(args.inputs),
+            [normalization] * len(args.inputs), [charset] * len(args.inputs)))
+
+    failures = [r for r in results if 'error' in r]
+    for failure in failures:
+        print(f"Échec {failure['input']}: {failure['error']}")
+    print(f"{len(results) - len(failures)}/{len(results)} polices exportées dans {args.output_dir}")
+
+
+if __name__ == "__main__":
+    main()
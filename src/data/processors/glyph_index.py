@@ -0,0 +1,231 @@
+# src/data/processors/glyph_index.py
+import hashlib
+import numpy as np
+from fontTools.ttLib import TTFont
+from fontTools.ttLib.tables._g_l_y_f import SCALED_COMPONENT_OFFSET, SCALE_COMPONENT_OFFSET_DEFAULT, \
+    UNSCALED_COMPONENT_OFFSET
+from pathlib import Path
+from typing import Dict, Any, List, Optional, Tuple
+
+# Référence identité : (m00, m01, m10, m11, dx, dy), un point p devient p @ M + d
+IDENTITY = (1.0, 0.0, 0.0, 1.0, 0.0, 0.0)
+
+class GlyphIndex:
+    """
+    Index adressé par contenu des contours de glyphes.
+
+    Chaque contour simple (points, fins de contours, flags on-curve) est haché
+    et stocké une seule fois, quelle que soit la police ou la graisse qui le
+    contient. Un glyphe est une liste de références (contour, transformation
+    affine) : une seule référence identité pour un glyphe simple, une par
+    composant (transformations imbriquées composées) pour un glyphe composite.
+    Les points ne sont développés qu'à la demande, par `expand`, en un seul
+    passage vectorisé.
+    """
+
+    def __init__(self):
+        self.outline_ids: Dict[bytes, int] = {}
+        self._outlines: List[np.ndarray] = []
+        self._outline_offsets = [0]
+        self._refs: List[Tuple[int, ...]] = []
+        self._glyph_ref_offsets = [0]
+        self._arrays = None
+
+    @property
+    def num_glyphs(self) -> int:
+        return len(self._glyph_ref_offsets) - 1
+
+    @property
+    def num_outlines(self) -> int:
+        return len(self._outlines)
+
+    def _outline_id(self, coordinates: np.ndarray, end_pts, flags) -> int:
+        """Identifiant d'un contour, créé s'il n'a encore jamais été vu"""
+        digest = hashlib.blake2b(coordinates.tobytes(), digest_size=16)
+        digest.update(np.asarray(end_pts, dtype=np.int32).tobytes())
+        digest.update(bytes(f & 1 for f in flags))
+        key = digest.digest()
+
+        outline_id = self.outline_ids.get(key)
+        if outline_id is None:
+            outline_id = len(self._outlines)
+            self.outline_ids[key] = outline_id
+            self._outlines.append(coordinates)
+            self._outline_offsets.append(self._outline_offsets[-1] + len(coordinates))
+            self._arrays = None
+        return outline_id
+
+    def _resolve(self, glyf_table, glyph_name: str, resolved: Dict[str, List[Tuple]],
+                 depth: int = 0) -> List[Tuple]:
+        """Références (contour, transformation) d'un glyphe, composants imbriqués compris"""
+        if glyph_name in resolved:
+            return resolved[glyph_name]
+        if depth > 32:
+            raise ValueError(f"Référence de composant récursive dans {glyph_name}")
+
+        glyph = glyf_table[glyph_name]
+        refs = []
+        if glyph.numberOfContours > 0:
+            coordinates = np.frombuffer(glyph.coordinates.array, dtype=np.float64).reshape(-1, 2)
+            if len(coordinates):
+                refs = [(self._outline_id(coordinates.copy(), glyph.endPtsOfContours, glyph.flags),) + IDENTITY]
+        elif glyph.isComposite():
+            if any(hasattr(component, 'firstPt') for component in glyph.components):
+                # Placement par points d'ancrage : dépend des points déjà posés, on aplatit
+                coordinates, end_pts, flags = glyph.getCoordinates(glyf_table)
+                points = np.frombuffer(coordinates.array, dtype=np.float64).reshape(-1, 2).copy()
+                refs = [(self._outline_id(points, end_pts, flags),) + IDENTITY] if len(points) else []
+            else:
+                for component in glyph.components:
+                    matrix = np.array(getattr(component, 'transform', [[1.0, 0.0], [0.0, 1.0]]), dtype=np.float64)
+                    move = np.array([component.x, component.y], dtype=np.float64)
+                    if hasattr(component, 'transform'):
+                        scaled = component.flags & SCALED_COMPONENT_OFFSET
+                        if not scaled and not component.flags & UNSCALED_COMPONENT_OFFSET:
+                            scaled = SCALE_COMPONENT_OFFSET_DEFAULT
+                        if scaled:
+                            # Convention Apple : le décalage est lui aussi transformé
+                            move = move @ matrix
+                    for outline_id, *child in self._resolve(glyf_table, component.glyphName, resolved, depth + 1):
+                        child_matrix = np.array(child[:4], dtype=np.float64).reshape(2, 2)
+                        combined = child_matrix @ matrix
+                        offset = np.array(child[4:], dtype=np.float64) @ matrix + move
+                        refs.append((outline_id, *combined.reshape(-1).tolist(), *offset.tolist()))
+
+        resolved[glyph_name] = refs
+        return refs
+
+    def add_font(self, font: TTFont, glyph_names: Optional[List[Optional[str]]] = None) -> Dict[str, Any]:
+        """
+        Ajoute les glyphes non vides d'une police (simples et composites).
+
+        Args:
+            font: Police source
+            glyph_names: Glyphes à ajouter, dans cet ordre (sélection par
+                Charset, None pour un caractère absent) ; par défaut tous ceux
+                de la table glyf
+
+        Returns:
+            Dict avec `names` et `glyph_ids` (indices dans l'index), `skipped`
+            (glyphes vides) et `failed` (liste de (nom, exception)). Sans
+            `glyph_names`, seuls les glyphes non vides sont listés, dans
+            l'ordre de la table glyf ; avec, `names` et `glyph_ids` restent
+            alignés sur `glyph_names`, avec -1 pour les glyphes absents, vides
+            ou en échec.
+        """
+        glyf_table = font['glyf']
+        resolved: Dict[str, List[Tuple]] = {}
+        names, glyph_ids, failed = [], [], []
+        skipped = 0
+        aligned = glyph_names is not None
+
+        for glyph_name in (glyph_names if aligned else glyf_table.glyphs):
+            try:
+                refs = self._resolve(glyf_table, glyph_name, resolved) if glyph_name is not None else []
+            except Exception as e:
+                failed.append((glyph_name, e))
+                refs = None
+            if not refs:
+                skipped += refs is not None and glyph_name is not None
+                if aligned:
+                    names.append(glyph_name)
+                    glyph_ids.append(-1)
+                continue
+            names.append(glyph_name)
+            glyph_ids.append(self.num_glyphs)
+            self._refs.extend(refs)
+            self._glyph_ref_offsets.append(len(self._refs))
+        self._arrays = None
+
+        return {'names': names, 'glyph_ids': np.array(glyph_ids, dtype=np.int64), 'skipped': skipped, 'failed': failed}
+
+    def arrays(self) -> Dict[str, np.ndarray]:
+        """
+        Représentation en tableaux de l'index :
+            coordinates (P, 2) points uniques en unités de la police,
+            outline_offsets (O + 1,), refs (R,) contour référencé,
+            transforms (R, 6) en (m00, m01, m10, m11, dx, dy),
+            glyph_ref_offsets (G + 1,)
+        """
+        if self._arrays is None:
+            refs = np.array(self._refs, dtype=np.float64).reshape(-1, 7)
+            self._arrays = {
+                'coordinates': np.concatenate(self._outlines) if self._outlines else np.zeros((0, 2)),
+                'outline_offsets': np.array(self._outline_offsets, dtype=np.int64),
+                'refs': refs[:, 0].astype(np.int64),
+                'transforms': refs[:, 1:],
+                'glyph_ref_offsets': np.array(self._glyph_ref_offsets, dtype=np.int64),
+            }
+        return self._arrays
+
+    def expand(self, glyph_ids: np.ndarray, scale: float = 1.0) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Développe des glyphes en points, sans boucle Python sur les glyphes.
+
+        Args:
+            glyph_ids: Indices des glyphes dans l'index (-1 : glyphe vide)
+            scale: Diviseur appliqué aux points (1 : unités de la police)
+
+        Returns:
+            Tuple (points paddés (G, max_points, 2) float32, longueurs (G,) int64)
+        """
+        arrays = self.arrays()
+        glyph_ids = np.asarray(glyph_ids, dtype=np.int64)
+        valid = glyph_ids >= 0
+        ref_starts = arrays['glyph_ref_offsets'][np.where(valid, glyph_ids, 0)]
+        ref_counts = np.where(valid, arrays['glyph_ref_offsets'][np.where(valid, glyph_ids + 1, 0)] - ref_starts, 0)
+        ref_index = _ranges(ref_starts, ref_counts)
+        glyph_of_ref = np.repeat(np.arange(len(glyph_ids)), ref_counts)
+
+        outlines = arrays['refs'][ref_index]
+        point_starts = arrays['outline_offsets'][outlines]
+        point_counts = arrays['outline_offsets'][outlines + 1] - point_starts
+        points = arrays['coordinates'][_ranges(point_starts, point_counts)]
+
+        # Transformation de chaque point par la matrice et le décalage de sa référence
+        transforms = np.repeat(arrays['transforms'][ref_index], point_counts, axis=0)
+        points = np.einsum('ni,nij->nj', points, transforms[:, :4].reshape(-1, 2, 2)) + transforms[:, 4:]
+
+        lengths = np.bincount(glyph_of_ref, weights=point_counts, minlength=len(glyph_ids)).astype(np.int64)
+        glyph_of_point = np.repeat(glyph_of_ref, point_counts)
+        glyph_starts = np.concatenate([[0], np.cumsum(lengths)[:-1]]) if len(lengths) else lengths
+        positions = np.arange(len(points)) - glyph_starts[glyph_of_point]
+
+        glyphs = np.zeros((len(glyph_ids), int(lengths.max()) if len(lengths) else 0, 2), dtype=np.float32)
+        glyphs[glyph_of_point, positions] = points / scale
+        return glyphs, lengths
+
+    def stats(self) -> Dict[str, int]:
+        """Points stockés (uniques) et points développés (tous glyphes confondus)"""
+        arrays = self.arrays()
+        outline_lengths = np.diff(arrays['outline_offsets'])
+        return {
+            'glyphs': self.num_glyphs,
+            'outlines': self.num_outlines,
+            'references': len(arrays['refs']),
+            'stored_points': len(arrays['coordinates']),
+            'expanded_points': int(outline_lengths[arrays['refs']].sum()) if len(arrays['refs']) else 0,
+        }
+
+
+def _ranges(starts: np.ndarray, counts: np.ndarray) -> np.ndarray:
+    """Concatène les intervalles [start, start + count) sans boucle Python"""
+    total = int(counts.sum())
+    if total == 0:
+        return np.zeros(0, dtype=np.int64)
+    # Position dans la sortie du début de chaque intervalle
+    offsets = np.concatenate([[0], np.cumsum(counts)[:-1]])
+    return np.arange(total) - np.repeat(offsets - starts, counts)
+
+
+if __name__ == "__main__":
+    # Test de l'index sur les polices d'entraînement
+    index = GlyphIndex()
+    for font_path in sorted(Path("data/fonts/train").glob("*.ttf")):
+        result = index.add_font(TTFont(font_path))
+        glyphs, lengths = index.expand(result['glyph_ids'])
+        print(f"{font_path.name}: {len(result['names'])} glyphes, {result['skipped']} vides, "
+              f"{len(result['failed'])} échecs -> {tuple(glyphs.shape)}")
+    stats = index.stats()
+    print(f"{stats['outlines']} contours uniques pour {stats['glyphs']} glyphes, "
+          f"{stats['stored_points']} points stockés sur {stats['expanded_points']} développés")
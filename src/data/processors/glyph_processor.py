@@ -1,11 +1,30 @@
 # src/data/processors/glyph_processor.py
 
+import logging
+import numpy as np
+from array import array
+from collections.abc import Sequence
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 from fontTools.pens.basePen import BasePen
-from typing import Dict, List, Any
+from fontTools.ttLib import TTFont
+from pathlib import Path
+from typing import Dict, List, Any, Iterable, Optional
+
+from src.data.instrumentation import Instrumentation, get_instrumentation
+
+logger = logging.getLogger(__name__)
+
+# Types de points, stockés sous forme de codes uint8. Les courbes quadratiques
+# (TrueType) sont gardées telles quelles plutôt que converties en cubiques.
+POINT_TYPES = ('move', 'line', 'control1', 'control2', 'curve', 'qcontrol', 'qcurve')
+MOVE, LINE, CONTROL1, CONTROL2, CURVE, QCONTROL, QCURVE = range(len(POINT_TYPES))
 
 class GlyphProcessor:
     """Processeur pour extraire et normaliser les données des glyphes"""
 
+    def __init__(self, instrumentation: Optional[Instrumentation] = None):
+        self.instrumentation = instrumentation or get_instrumentation()
+
     def process_glyph(self, glyph) -> Dict[str, Any]:
         """
         Traite un glyphe individuel.
@@ -14,15 +33,127 @@ class GlyphProcessor:
             glyph: Le glyphe à traiter
 
         Returns:
-            Dict contenant les données du glyphe
+            Dict contenant les données du glyphe. `outline` est la représentation
+            compacte ; `contours` et `control_points` en sont des vues qui ne
+            créent les dicts de points qu'à l'accès.
         """
+        outline = self._extract_outline(glyph)
         return {
-            'contours': self._extract_contours(glyph),
+            'outline': outline,
+            'contours': outline.contours,
             'metrics': self._extract_metrics(glyph),
-            'control_points': self._extract_control_points(glyph),
+            'control_points': outline.points,
             'bounds': self._extract_bounds(glyph)
         }
 
+    def process_font_glyphs(self, glyph_set, names: Optional[Iterable[str]] = None,
+                            num_workers: int = 0, font_path: Optional[Path] = None) -> Dict[str, Any]:
+        """
+        Traite tous les glyphes d'une police en un seul passage.
+
+        Tous les glyphes sont tracés dans un même pen ; les résultats sont
+        renvoyés en colonnes (struct-of-arrays) plutôt qu'en un dict par glyphe.
+
+        Args:
+            glyph_set: Le glyph set de la police
+            names: Noms des glyphes à traiter (tous par défaut)
+            num_workers: Si > 1, répartit les glyphes entre plusieurs workers
+            font_path: Si fourni avec num_workers, utilise des processus qui
+                rouvrent la police au lieu de threads
+
+        Returns:
+            Dict avec `names`, `coordinates` (P, 2), `point_types` (P,),
+            `point_offsets` (G + 1,), `contour_offsets` (C + 1,) en indices de
+            points, `glyph_contour_offsets` (G + 1,) en indices de contours,
+            `bounds` (G, 4) en xMin, yMin, xMax, yMax, `advance_widths` (G,)
+            et `failed` (noms des glyphes en erreur)
+        """
+        names = list(glyph_set.keys()) if names is None else list(names)
+
+        with self.instrumentation.timer('glyph.process_font_glyphs'):
+            if num_workers > 1 and len(names) > num_workers:
+                chunks = [list(chunk) for chunk in np.array_split(np.array(names, dtype=object), num_workers)]
+                if font_path is not None:
+                    with ProcessPoolExecutor(max_workers=num_workers) as executor:
+                        results = list(executor.map(_process_font_chunk, [font_path] * len(chunks), chunks))
+                else:
+                    with ThreadPoolExecutor(max_workers=num_workers) as executor:
+                        results = list(executor.map(lambda chunk: self._process_glyph_chunk(glyph_set, chunk), chunks))
+                columns = _concat_glyph_columns(results)
+            else:
+                columns = self._process_glyph_chunk(glyph_set, names)
+
+        # Comptes agrégés ici, y compris pour les lots traités dans d'autres processus
+        self.instrumentation.count('glyph.glyphs.processed', len(names) - len(columns['failed']))
+        self.instrumentation.count('glyph.glyphs.failed', len(columns['failed']))
+        self.instrumentation.observe('glyph.points_per_glyph', np.diff(columns['point_offsets']))
+        return columns
+
+    def _process_glyph_chunk(self, glyph_set, names: List[str]) -> Dict[str, Any]:
+        """Trace une liste de glyphes dans un pen partagé et découpe le résultat"""
+        pen = GlyphPointPen(glyph_set)
+        point_offsets = array('q', [0])
+        glyph_contour_offsets = array('q', [0])
+        advance_widths = array('f')
+        failed = []
+
+        for name in names:
+            num_points = len(pen.point_types)
+            num_contours = len(pen.contour_starts)
+            try:
+                glyph = glyph_set[name]
+                glyph.draw(pen)
+                advance_widths.append(glyph.width)
+            except Exception as e:
+                logger.debug("Échec du tracé du glyphe %s: %s: %s", name, type(e).__name__, e)
+                # Annule un éventuel tracé partiel
+                del pen.coordinates[2 * num_points:]
+                del pen.point_types[num_points:]
+                del pen.contour_starts[num_contours:]
+                advance_widths.append(0.0)
+                failed.append(name)
+            point_offsets.append(len(pen.point_types))
+            glyph_contour_offsets.append(len(pen.contour_starts))
+
+        outline = pen.get_outline()
+        point_offsets = np.frombuffer(point_offsets, dtype=np.int64)
+
+        return {
+            'names': names,
+            'coordinates': outline.coordinates,
+            'point_types': outline.point_types,
+            'point_offsets': point_offsets,
+            'contour_offsets': outline.contour_offsets.astype(np.int64),
+            'glyph_contour_offsets': np.frombuffer(glyph_contour_offsets, dtype=np.int64),
+            'bounds': self._compute_bounds(outline.coordinates, point_offsets),
+            'advance_widths': np.frombuffer(advance_widths, dtype=np.float32),
+            'failed': failed,
+        }
+
+    def _compute_bounds(self, coordinates: np.ndarray, point_offsets: np.ndarray) -> np.ndarray:
+        """Boîtes englobantes (points de contrôle inclus) de chaque glyphe, vectorisées"""
+        bounds = np.zeros((len(point_offsets) - 1, 4), dtype=np.float32)
+        starts = point_offsets[:-1]
+        non_empty = point_offsets[1:] > starts
+        if non_empty.any():
+            # reduceat sur les seuls glyphes non vides, dont les débuts sont strictement croissants
+            starts = starts[non_empty]
+            bounds[non_empty, :2] = np.minimum.reduceat(coordinates, starts, axis=0)
+            bounds[non_empty, 2:] = np.maximum.reduceat(coordinates, starts, axis=0)
+        return bounds
+
+    @staticmethod
+    def outline_at(columns: Dict[str, Any], index: int) -> 'GlyphOutline':
+        """Vue GlyphOutline (sans copie) d'un glyphe d'un résultat de process_font_glyphs"""
+        start, stop = columns['point_offsets'][index:index + 2]
+        first, last = columns['glyph_contour_offsets'][index:index + 2]
+        return GlyphOutline(
+            columns['coordinates'][start:stop],
+            columns['point_types'][start:stop],
+            # Les contours du glyphe + le début du contour suivant, ramenés au glyphe
+            np.append(columns['contour_offsets'][first:last], stop) - start,
+        )
+
     def _extract_metrics(self, glyph) -> Dict[str, float]:
         """Extrait les métriques du glyphe"""
         return {
@@ -44,68 +175,162 @@ class GlyphProcessor:
         except:
             return {'xMin': 0, 'yMin': 0, 'xMax': 0, 'yMax': 0}
 
-    def _extract_contours(self, glyph) -> List[Dict]:
-        """Extrait les contours du glyphe"""
-        pen = GlyphPointPen()
+    def _extract_outline(self, glyph) -> 'GlyphOutline':
+        """Extrait les contours et points de contrôle en un seul tracé"""
+        pen = GlyphPointPen(getattr(glyph, 'glyphSet', None))
         glyph.draw(pen)
-        return pen.get_contours()
+        return pen.get_outline()
 
-    def _extract_control_points(self, glyph) -> List[Dict]:
-        """Extrait les points de contrôle"""
-        pen = GlyphPointPen()
-        glyph.draw(pen)
-        return pen.get_points()
+def _process_font_chunk(font_path: Path, names: List[str]) -> Dict[str, Any]:
+    """Worker de process_font_glyphs : rouvre la police et traite un lot de glyphes"""
+    font = TTFont(font_path, lazy=True)
+    return GlyphProcessor()._process_glyph_chunk(font.getGlyphSet(), names)
+
+def _concat_glyph_columns(results: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Concatène les résultats en colonnes de plusieurs lots, en décalant les offsets"""
+    point_shift = 0
+    contour_shift = 0
+    point_offsets = [np.zeros(1, dtype=np.int64)]
+    contour_offsets = []
+    glyph_contour_offsets = [np.zeros(1, dtype=np.int64)]
+
+    for result in results:
+        point_offsets.append(result['point_offsets'][1:] + point_shift)
+        contour_offsets.append(result['contour_offsets'][:-1] + point_shift)
+        glyph_contour_offsets.append(result['glyph_contour_offsets'][1:] + contour_shift)
+        point_shift += len(result['point_types'])
+        contour_shift += len(result['contour_offsets']) - 1
+    contour_offsets.append(np.array([point_shift], dtype=np.int64))
+
+    return {
+        'names': [name for result in results for name in result['names']],
+        'coordinates': np.concatenate([result['coordinates'] for result in results]),
+        'point_types': np.concatenate([result['point_types'] for result in results]),
+        'point_offsets': np.concatenate(point_offsets),
+        'contour_offsets': np.concatenate(contour_offsets),
+        'glyph_contour_offsets': np.concatenate(glyph_contour_offsets),
+        'bounds': np.concatenate([result['bounds'] for result in results]),
+        'advance_widths': np.concatenate([result['advance_widths'] for result in results]),
+        'failed': [name for result in results for name in result['failed']],
+    }
+
+class GlyphOutline:
+    """
+    Contours d'un glyphe sous forme de tableaux.
+
+    Attributes:
+        coordinates: Tableau float32 (num_points, 2)
+        point_types: Tableau uint8 (num_points,) de codes POINT_TYPES
+        contour_offsets: Tableau int32 (num_contours + 1,), le contour i
+            couvre les points [contour_offsets[i], contour_offsets[i + 1])
+    """
+
+    __slots__ = ('coordinates', 'point_types', 'contour_offsets')
+
+    def __init__(self, coordinates: np.ndarray, point_types: np.ndarray, contour_offsets: np.ndarray):
+        self.coordinates = coordinates
+        self.point_types = point_types
+        self.contour_offsets = contour_offsets
+
+    def __len__(self) -> int:
+        return len(self.point_types)
+
+    @property
+    def num_contours(self) -> int:
+        return len(self.contour_offsets) - 1
+
+    @property
+    def points(self) -> 'PointView':
+        """Vue de tous les points, au format dict"""
+        return PointView(self, 0, len(self))
+
+    @property
+    def contours(self) -> List['PointView']:
+        """Vue de chaque contour, au format dict"""
+        offsets = self.contour_offsets.tolist()
+        return [PointView(self, start, stop) for start, stop in zip(offsets[:-1], offsets[1:])]
+
+class PointView(Sequence):
+    """Vue en lecture seule sur une plage de points, qui crée les dicts à l'accès"""
+
+    __slots__ = ('outline', 'start', 'stop')
+
+    def __init__(self, outline: GlyphOutline, start: int, stop: int):
+        self.outline = outline
+        self.start = start
+        self.stop = stop
+
+    def __len__(self) -> int:
+        return self.stop - self.start
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError(index)
+        i = self.start + index
+        x, y = self.outline.coordinates[i].tolist()
+        return {'x': x, 'y': y, 'type': POINT_TYPES[self.outline.point_types[i]]}
 
 class GlyphPointPen(BasePen):
-    """Pen personnalisé pour extraire les points des glyphes"""
+    """Pen personnalisé pour extraire les points des glyphes dans des tableaux compacts"""
 
-    def __init__(self):
-        super().__init__(None)
-        self.contours = []
-        self.current_contour = []
-        self.points = []
+    def __init__(self, glyph_set=None):
+        # Le glyph set permet de décomposer les glyphes composites
+        super().__init__(glyph_set)
+        self.coordinates = array('f')
+        self.point_types = array('B')
+        self.contour_starts = array('i')
 
     def _moveTo(self, pt):
         """Point de départ d'un nouveau contour"""
-        if self.current_contour:
-            self.contours.append(self.current_contour)
-            self.current_contour = []
-        self._add_point(pt, 'move')
+        self.contour_starts.append(len(self.point_types))
+        self._add_point(pt, MOVE)
 
     def _lineTo(self, pt):
         """Ligne droite vers un point"""
-        self._add_point(pt, 'line')
+        self._add_point(pt, LINE)
 
     def _curveToOne(self, pt1, pt2, pt3):
         """Courbe de Bézier cubique"""
-        self._add_point(pt1, 'control1')
-        self._add_point(pt2, 'control2')
-        self._add_point(pt3, 'curve')
-
-    def _add_point(self, pt, type_):
-        """Ajoute un point avec son type"""
-        point = {
-            'x': pt[0],
-            'y': pt[1],
-            'type': type_
-        }
-        self.current_contour.append(point)
-        self.points.append(point)
+        self._add_point(pt1, CONTROL1)
+        self._add_point(pt2, CONTROL2)
+        self._add_point(pt3, CURVE)
+
+    def _qCurveToOne(self, pt1, pt2):
+        """Courbe de Bézier quadratique"""
+        self._add_point(pt1, QCONTROL)
+        self._add_point(pt2, QCURVE)
+
+    def _add_point(self, pt, type_code):
+        """Ajoute un point avec son code de type"""
+        self.coordinates.append(pt[0])
+        self.coordinates.append(pt[1])
+        self.point_types.append(type_code)
 
-    def get_contours(self):
+    def get_outline(self) -> GlyphOutline:
+        """Retourne les tableaux remplis, sans copie"""
+        offsets = array('i', self.contour_starts)
+        offsets.append(len(self.point_types))
+        return GlyphOutline(
+            np.frombuffer(self.coordinates, dtype=np.float32).reshape(-1, 2),
+            np.frombuffer(self.point_types, dtype=np.uint8),
+            np.frombuffer(offsets, dtype=np.int32),
+        )
+
+    def get_contours(self) -> List[PointView]:
         """Retourne tous les contours"""
-        if self.current_contour:
-            self.contours.append(self.current_contour)
-        return self.contours
+        return self.get_outline().contours
 
-    def get_points(self):
+    def get_points(self) -> PointView:
         """Retourne tous les points"""
-        return self.points
+        return self.get_outline().points
 
 if __name__ == "__main__":
     # Test du processor
-    from font_processor import FontProcessor
-    from pathlib import Path
+    from src.data.processors.font_processor import FontProcessor
 
     # Charger une police
     font_processor = FontProcessor()
@@ -141,3 +366,10 @@ if __name__ == "__main__":
             print("\nDétails des points:")
             for i, point in enumerate(result['control_points']):
                 print(f"Point {i+1}: type={point['type']}, x={point['x']}, y={point['y']}")
+
+        # Traitement de toute la police en colonnes
+        columns = glyph_processor.process_font_glyphs(glyph_set)
+        print(f"\nPolice complète : {len(columns['names'])} glyphes, "
+              f"{len(columns['point_types'])} points, "
+              f"{len(columns['contour_offsets']) - 1} contours, "
+              f"{len(columns['failed'])} échecs")
@@ -0,0 +1,163 @@
+# src/data/processors/normalization.py
+"""
+Normalisation des coordonnées de glyphes.
+
+Les points restent en unités de la police de l'ingestion jusqu'au collate.
+Chaque police est décrite par quelques statistiques (units_per_em,
+ascendante, descendante et boîte englobante robuste de ses contours),
+calculées en un seul passage vectorisé sur ses points ; le corpus en déduit
+un centre et une demi-hauteur de ligne communs. Un point p d'une police
+devient :
+
+    (p / units_per_em - centre) / demi_hauteur
+
+soit, par police, une simple multiplication et un décalage appliqués au
+batch entier dans collate_glyphs. Les polices à 1000, 2048 ou 4096 unités
+par em se retrouvent ainsi à la même échelle.
+"""
+import json
+import numpy as np
+import torch
+from fontTools.ttLib import TTFont
+from pathlib import Path
+from typing import Dict, Any, Optional
+
+# Colonnes des statistiques par police (tableaux (F, len(FONT_STATS_FIELDS)) float32)
+FONT_STATS_FIELDS = ('units_per_em', 'ascent', 'descent', 'x_min', 'y_min', 'x_max', 'y_max')
+UNITS_PER_EM, ASCENT, DESCENT, X_MIN, Y_MIN, X_MAX, Y_MAX = range(len(FONT_STATS_FIELDS))
+
+# Quantiles des bornes : quelques glyphes très larges (ligatures, logos) ne comptent pas
+BOUNDS_QUANTILES = (0.01, 0.99)
+
+# Statistiques de corpus neutres : les points normalisés sont en em
+EM_CORPUS = {'center': [0.0, 0.0], 'half_extent': 1.0, 'fonts': 0}
+
+
+def font_statistics(font: TTFont, points: np.ndarray) -> np.ndarray:
+    """
+    Statistiques d'une police.
+
+    Args:
+        font: Police source (head, hhea)
+        points: Tous ses points (P, 2) en unités de la police, à plat
+
+    Returns:
+        Tableau (len(FONT_STATS_FIELDS),) float32. La boîte englobante va
+        des quantiles BOUNDS_QUANTILES des points ; sans points, c'est celle
+        de la table head.
+    """
+    head = font['head']
+    if len(points):
+        (x_min, y_min), (x_max, y_max) = np.quantile(points, BOUNDS_QUANTILES, axis=0)
+    else:
+        x_min, y_min, x_max, y_max = head.xMin, head.yMin, head.xMax, head.yMax
+    return np.array([head.unitsPerEm, font['hhea'].ascent, font['hhea'].descent,
+                     x_min, y_min, x_max, y_max], dtype=np.float32)
+
+
+def corpus_statistics(font_stats: np.ndarray) -> Dict[str, Any]:
+    """
+    Centre et demi-hauteur de ligne du corpus, en em.
+
+    Médianes sur les polices, pour qu'une police aux métriques aberrantes ne
+    décale pas tout le corpus : centre horizontal des boîtes englobantes,
+    centre vertical et demi-écart entre ascendante et descendante.
+    """
+    font_stats = np.asarray(font_stats, dtype=np.float64).reshape(-1, len(FONT_STATS_FIELDS))
+    # Lignes NaN : polices illisibles, gardées pour l'alignement des indices
+    font_stats = font_stats[~np.isnan(font_stats).any(axis=1)]
+    if len(font_stats) == 0:
+        return dict(EM_CORPUS)
+
+    em = np.maximum(font_stats[:, UNITS_PER_EM], 1.0)
+    center_x = (font_stats[:, X_MIN] + font_stats[:, X_MAX]) / (2 * em)
+    center_y = (font_stats[:, ASCENT] + font_stats[:, DESCENT]) / (2 * em)
+    half_extent = (font_stats[:, ASCENT] - font_stats[:, DESCENT]) / (2 * em)
+    return {
+        'center': [float(np.median(center_x)), float(np.median(center_y))],
+        'half_extent': float(np.median(half_extent[half_extent > 0])) if np.any(half_extent > 0) else 1.0,
+        'fonts': len(font_stats),
+        'units_per_em': sorted(set(font_stats[:, UNITS_PER_EM].astype(int).tolist())),
+    }
+
+
+def load_corpus_statistics(manifest_path: Path) -> Dict[str, Any]:
+    """
+    Statistiques de corpus d'un manifeste de shards (`normalization`).
+
+    Ce sont celles qu'utilisent FontWriter et le serveur d'inférence ; sans
+    manifeste, EM_CORPUS (points simplement ramenés en em), qui est aussi
+    leur valeur par défaut.
+    """
+    try:
+        with open(manifest_path) as f:
+            return json.load(f).get('normalization') or dict(EM_CORPUS)
+    except FileNotFoundError:
+        return dict(EM_CORPUS)
+
+
+class GlyphNormalizer:
+    """
+    Normalisation par police précalculée pour tout un dataset.
+
+    `scale` (F,) et `offset` (2,) sont calculés une fois ; `normalize`
+    n'est ensuite qu'une opération vectorisée par batch, indexée par
+    `font_index`.
+    """
+
+    def __init__(self, font_stats: np.ndarray, corpus: Optional[Dict[str, Any]] = None):
+        """
+        Args:
+            font_stats: Statistiques (F, len(FONT_STATS_FIELDS)) dans l'ordre des
+                indices de police du dataset
+            corpus: Statistiques de corpus (celles du manifeste des shards par
+                exemple) ; recalculées depuis `font_stats` si absentes
+        """
+        self.font_stats = np.asarray(font_stats, dtype=np.float32).reshape(-1, len(FONT_STATS_FIELDS))
+        self.corpus = corpus or corpus_statistics(self.font_stats)
+
+        half_extent = self.corpus['half_extent']
+        em = np.maximum(self.font_stats[:, UNITS_PER_EM], 1.0)
+        self.scale = torch.from_numpy((1.0 / (em * half_extent)).astype(np.float32))
+        self.offset = -torch.tensor(self.corpus['center'], dtype=torch.float32) / half_extent
+
+    def normalize(self, points: torch.Tensor, font_index: torch.Tensor,
+                  mask: Optional[torch.Tensor] = None) -> torch.Tensor:
+        """
+        Args:
+            points: Points (B, L, 2) en unités de leurs polices
+            font_index: Police de chaque glyphe (B,)
+            mask: Points réels (B, L) ; le padding reste à zéro
+
+        Returns:
+            Points normalisés (B, L, 2)
+        """
+        normalized = points * self.scale[font_index].view(-1, 1, 1) + self.offset
+        if mask is not None:
+            normalized = normalized * mask.unsqueeze(-1)
+        return normalized
+
+    @staticmethod
+    def denormalize(points: np.ndarray, units_per_em: float, corpus: Optional[Dict[str, Any]] = None) -> np.ndarray:
+        """Inverse de `normalize` pour une police de `units_per_em` unités par em"""
+        corpus = corpus or EM_CORPUS
+        return (points * corpus['half_extent'] + np.asarray(corpus['center'])) * units_per_em
+
+
+if __name__ == "__main__":
+    # Test des statistiques sur les polices d'entraînement
+    from pathlib import Path
+    from src.data.processors.glyph_index import GlyphIndex
+
+    stats = []
+    for font_path in sorted(Path("data/fonts/train").glob("*.ttf")):
+        font = TTFont(font_path)
+        index = GlyphIndex()
+        glyphs, lengths = index.expand(index.add_font(font)['glyph_ids'])
+        mask = np.arange(glyphs.shape[1])[None, :] < lengths[:, None]
+        stats.append(font_statistics(font, glyphs[mask]))
+        print(f"{font_path.name}: {dict(zip(FONT_STATS_FIELDS, stats[-1].tolist()))}")
+
+    normalizer = GlyphNormalizer(np.stack(stats))
+    print(f"Corpus : {normalizer.corpus}")
+    print(f"Échelles par police : {normalizer.scale.tolist()}, décalage : {normalizer.offset.tolist()}")
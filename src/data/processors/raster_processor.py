@@ -0,0 +1,289 @@
+# src/data/processors/raster_processor.py
+"""
+Rastérisation des glyphes en bitmaps ou en champs de distance signée (SDF).
+
+Usage :
+    python -m src.data.processors.raster_processor --mode sdf --size 64
+"""
+import argparse
+import json
+import time
+import numpy as np
+import yaml
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Dict, Any, List, Optional, Tuple
+
+from src.data.processors.font_processor import FontProcessor
+from src.data.processors.glyph_processor import GlyphProcessor, LINE, CURVE, QCURVE
+
+class RasterProcessor:
+    """
+    Processeur pour rastériser tous les glyphes d'une police en une fois.
+
+    Les contours de GlyphProcessor.process_font_glyphs sont aplatis en
+    segments pour toute la police, puis l'intérieur (règle non-zéro, par
+    lignes de balayage) et la distance aux segments sont calculés pour tout
+    un lot de glyphes en opérations NumPy.
+    """
+
+    def __init__(self, size: int = 64, mode: str = 'bitmap', curve_steps: int = 8,
+                 sdf_spread: float = 8.0, padding: float = 0.05, max_pairs: int = 1 << 23):
+        """
+        Args:
+            size: Côté des images en pixels
+            mode: 'bitmap' (uint8, 0 ou 255) ou 'sdf' (float16, en pixels,
+                négatif à l'intérieur, borné à ±sdf_spread)
+            curve_steps: Nombre de segments par courbe de Bézier
+            sdf_spread: Distance maximale représentée dans le SDF
+            padding: Marge autour de la boîte ascent/descent, en fraction
+            max_pairs: Nombre maximal de couples pixel (ou ligne) × segment par lot
+        """
+        if mode not in ('bitmap', 'sdf'):
+            raise ValueError(f"Mode non supporté: {mode}")
+        self.size = size
+        self.mode = mode
+        self.curve_steps = curve_steps
+        self.sdf_spread = sdf_spread
+        self.padding = padding
+        self.max_pairs = max_pairs
+        self.glyph_processor = GlyphProcessor()
+
+        # Centres des pixels, ligne 0 en haut de l'image
+        ys, xs = np.mgrid[0:size, 0:size].astype(np.float32) + 0.5
+        self.pixels = np.stack([xs.ravel(), (size - ys).ravel()], axis=-1)
+
+    @property
+    def dtype(self) -> np.dtype:
+        return np.dtype(np.uint8) if self.mode == 'bitmap' else np.dtype(np.float16)
+
+    def rasterize_font(self, font_data: Dict[str, Any]) -> Tuple[List[str], np.ndarray]:
+        """
+        Rastérise tous les glyphes d'une police.
+
+        Args:
+            font_data: Données de la police depuis FontProcessor
+
+        Returns:
+            Tuple (noms des glyphes, images (num_glyphs, size, size))
+        """
+        columns = self.glyph_processor.process_font_glyphs(font_data['glyph_set'])
+        out = np.zeros((len(columns['names']), self.size, self.size), dtype=self.dtype)
+        self.rasterize_columns(columns, font_data['metadata'], out)
+        return columns['names'], out
+
+    def rasterize_columns(self, columns: Dict[str, Any], metadata: Dict[str, Any], out: np.ndarray) -> None:
+        """Rastérise des résultats de process_font_glyphs directement dans `out` (éventuellement un memmap)"""
+        segments, glyph_ids = self._flatten(columns)
+        segments = self._to_pixels(segments, glyph_ids, columns['advance_widths'], metadata)
+
+        num_glyphs = len(columns['names'])
+        seg_offsets = np.searchsorted(glyph_ids, np.arange(num_glyphs + 1))
+        if self.mode == 'sdf':
+            out[:] = self.sdf_spread
+
+        # Lots de glyphes consécutifs dont le total de segments tient dans le budget ;
+        # le SDF compare chaque pixel à chaque segment, le bitmap seulement chaque ligne
+        pairs_per_segment = len(self.pixels) if self.mode == 'sdf' else self.size
+        max_segments = max(1, self.max_pairs // pairs_per_segment)
+        first = 0
+        while first < num_glyphs:
+            last = first + 1
+            while last < num_glyphs and seg_offsets[last + 1] - seg_offsets[first] <= max_segments:
+                last += 1
+            self._rasterize_batch(segments, seg_offsets[first:last + 1], out[first:last])
+            first = last
+
+    def _flatten(self, columns: Dict[str, Any]) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Convertit tous les contours de la police en segments (S, 2, 2).
+
+        Les indices des segments sont déduits des codes de points : une ligne
+        part du point précédent, une courbe cubique des 3 points précédents,
+        une quadratique des 2 points précédents, et chaque contour est
+        refermé sur son premier point.
+        """
+        coords = columns['coordinates']
+        types = columns['point_types']
+        contour_offsets = columns['contour_offsets']
+
+        line_end = np.flatnonzero(types == LINE)
+        lines = np.stack([coords[line_end - 1], coords[line_end]], axis=1)
+
+        t = np.linspace(0.0, 1.0, self.curve_steps + 1, dtype=np.float32)[None, :, None]
+        mt = 1.0 - t
+
+        cubic_end = np.flatnonzero(types == CURVE)
+        p0, p1, p2, p3 = (coords[cubic_end - k][:, None] for k in (3, 2, 1, 0))
+        cubic_points = mt ** 3 * p0 + 3 * mt ** 2 * t * p1 + 3 * mt * t ** 2 * p2 + t ** 3 * p3
+
+        quad_end = np.flatnonzero(types == QCURVE)
+        q0, q1, q2 = (coords[quad_end - k][:, None] for k in (2, 1, 0))
+        quad_points = mt ** 2 * q0 + 2 * mt * t * q1 + t ** 2 * q2
+
+        curve_end = np.concatenate([cubic_end, quad_end])
+        curve_points = np.concatenate([cubic_points, quad_points])
+        curves = np.stack([curve_points[:, :-1], curve_points[:, 1:]], axis=2).reshape(-1, 2, 2)
+
+        starts, ends = contour_offsets[:-1], contour_offsets[1:]
+        closing = np.stack([coords[ends - 1], coords[starts]], axis=1)
+
+        # Glyphe de chaque segment, à partir de l'indice de son point d'arrivée
+        point_glyphs = np.searchsorted(columns['point_offsets'], np.arange(len(coords)), side='right') - 1
+        glyph_ids = np.concatenate([
+            point_glyphs[line_end],
+            np.repeat(point_glyphs[curve_end], self.curve_steps),
+            point_glyphs[starts],
+        ])
+        segments = np.concatenate([lines, curves, closing]).astype(np.float32)
+
+        order = np.argsort(glyph_ids, kind='stable')
+        return segments[order], glyph_ids[order]
+
+    def _to_pixels(self, segments: np.ndarray, glyph_ids: np.ndarray,
+                   advance_widths: np.ndarray, metadata: Dict[str, Any]) -> np.ndarray:
+        """Passe des unités de la police aux pixels : boîte ascent/descent, glyphe centré sur son avance"""
+        ascent, descent = metadata['ascent'], metadata['descent']
+        height = (ascent - descent) * (1 + 2 * self.padding)
+        scale = self.size / height
+        x_origin = advance_widths[glyph_ids] / 2 - height / 2
+        y_origin = descent - (ascent - descent) * self.padding
+
+        pixels = np.empty_like(segments)
+        pixels[..., 0] = (segments[..., 0] - x_origin[:, None]) * scale
+        pixels[..., 1] = (segments[..., 1] - y_origin) * scale
+        return pixels
+
+    def _rasterize_batch(self, segments: np.ndarray, seg_offsets: np.ndarray, out: np.ndarray) -> None:
+        """Calcule les images d'un lot de glyphes en une passe"""
+        batch = segments[seg_offsets[0]:seg_offsets[-1]]
+        if len(batch) == 0:
+            return
+        starts = seg_offsets[:-1] - seg_offsets[0]
+        non_empty = np.flatnonzero(seg_offsets[1:] > seg_offsets[:-1])
+        glyph_of_segment = np.repeat(np.arange(len(starts)), np.diff(seg_offsets))
+
+        inside = self._scanline_inside(batch, glyph_of_segment, len(starts))
+
+        if self.mode == 'bitmap':
+            out[:] = inside.astype(np.uint8) * 255
+            return
+
+        # Distance de chaque pixel à chaque segment du lot, réduite par glyphe
+        px = self.pixels[:, 0:1]
+        py = self.pixels[:, 1:2]
+        ax, ay = batch[None, :, 0, 0], batch[None, :, 0, 1]
+        dx, dy = batch[None, :, 1, 0] - ax, batch[None, :, 1, 1] - ay
+        length_sq = np.maximum(dx * dx + dy * dy, 1e-12)
+        t = np.clip(((px - ax) * dx + (py - ay) * dy) / length_sq, 0.0, 1.0)
+        distance = np.hypot(px - (ax + t * dx), py - (ay + t * dy))
+        nearest = np.minimum.reduceat(distance, starts[non_empty], axis=1).T.reshape(-1, self.size, self.size)
+
+        sdf = np.where(inside[non_empty], -nearest, nearest)
+        out[non_empty] = np.clip(sdf, -self.sdf_spread, self.sdf_spread).astype(self.dtype)
+
+    def _scanline_inside(self, segments: np.ndarray, glyph_of_segment: np.ndarray, num_glyphs: int) -> np.ndarray:
+        """
+        Test intérieur/extérieur (règle non-zéro) par lignes de balayage.
+
+        Pour chaque couple (ligne, segment) qui se croisent, le sens du
+        segment est ajouté à la colonne du croisement ; le nombre
+        d'enroulement d'un pixel est la somme des croisements à sa droite.
+
+        Returns:
+            Tableau booléen (num_glyphs, size, size)
+        """
+        rows = (self.size - (np.arange(self.size, dtype=np.float32) + 0.5))[:, None]
+        ay, by = segments[None, :, 0, 1], segments[None, :, 1, 1]
+        ax, bx = segments[None, :, 0, 0], segments[None, :, 1, 0]
+
+        upward = (ay <= rows) & (by > rows)
+        downward = (by <= rows) & (ay > rows)
+        row_idx, seg_idx = np.nonzero(upward | downward)
+
+        a_x, a_y = ax[0, seg_idx], ay[0, seg_idx]
+        b_x, b_y = bx[0, seg_idx], by[0, seg_idx]
+        y = rows[row_idx, 0]
+        x_cross = a_x + (y - a_y) * (b_x - a_x) / (b_y - a_y)
+        # Le croisement est à droite des pixels de colonne j < ceil(x - 0.5)
+        column = np.clip(np.ceil(x_cross - 0.5), 0, self.size).astype(np.int64)
+        direction = np.where(upward[row_idx, seg_idx], 1, -1).astype(np.int32)
+
+        crossings = np.zeros((num_glyphs, self.size, self.size + 1), dtype=np.int32)
+        np.add.at(crossings, (glyph_of_segment[seg_idx], row_idx, column), direction)
+        # Somme suffixe : croisements de colonne k > j pour le pixel j
+        winding = np.cumsum(crossings[..., ::-1], axis=-1)[..., ::-1][..., 1:]
+        return winding != 0
+
+
+def _rasterize_font_file(font_path: Path, output_dir: Path, size: int, mode: str) -> Dict[str, Any]:
+    """Worker : rastérise une police dans un tableau memory-mappé sur disque"""
+    try:
+        font_data = FontProcessor().process_font(font_path)
+        processor = RasterProcessor(size=size, mode=mode)
+        columns = processor.glyph_processor.process_font_glyphs(font_data['glyph_set'])
+
+        output_path = output_dir / f"{font_path.stem}.{mode}.npy"
+        out = np.lib.format.open_memmap(
+            output_path, mode='w+', dtype=processor.dtype,
+            shape=(len(columns['names']), size, size))
+        processor.rasterize_columns(columns, font_data['metadata'], out)
+        out.flush()
+        return {'path': str(font_path), 'output': str(output_path), 'glyph_names': columns['names']}
+    except Exception as e:
+        return {'path': str(font_path), 'error': f"{type(e).__name__}: {e}"}
+
+
+def rasterize_corpus(font_paths: List[Path], output_dir: Path, size: int = 64, mode: str = 'bitmap',
+                     num_workers: int = 1) -> Dict[str, Any]:
+    """
+    Rastérise un corpus avec un pool de processus, une police par tâche.
+
+    Chaque police est écrite dans `<output_dir>/<nom>.<mode>.npy`, relisible
+    avec np.load(..., mmap_mode='r') ; l'index est écrit dans index.json.
+    """
+    output_dir.mkdir(parents=True, exist_ok=True)
+    start = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=num_workers) as executor:
+        results = list(executor.map(
+            _rasterize_font_file, font_paths,
+            [output_dir] * len(font_paths), [size] * len(font_paths), [mode] * len(font_paths)))
+
+    for result in results:
+        if 'error' in result:
+            print(f"Échec {result['path']}: {result['error']}")
+
+    index = {
+        'size': size,
+        'mode': mode,
+        'fonts': [r for r in results if 'error' not in r],
+        'failures': [r for r in results if 'error' in r],
+        'seconds': time.perf_counter() - start,
+    }
+    with open(output_dir / 'index.json', 'w') as f:
+        json.dump(index, f, indent=2)
+    return index
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Rastérisation des glyphes du corpus")
+    parser.add_argument('--config', type=Path, default=Path('configs/data/default.yaml'))
+    parser.add_argument('--split', default='train')
+    parser.add_argument('--mode', choices=['bitmap', 'sdf'], default='bitmap')
+    parser.add_argument('--size', type=int, default=64)
+    args = parser.parse_args(argv)
+
+    with open(args.config) as f:
+        config = yaml.safe_load(f)['data']
+
+    font_paths = sorted(p for p in Path(config[f"{args.split}_dir"]).rglob("*") if p.suffix.lower() == '.ttf')
+    output_dir = Path(config.get('raster_dir', 'data/rasters')) / args.split
+    index = rasterize_corpus(font_paths, output_dir, args.size, args.mode, config.get('num_workers', 1))
+
+    num_glyphs = sum(len(font['glyph_names']) for font in index['fonts'])
+    print(f"{len(index['fonts'])} polices, {num_glyphs} glyphes rastérisés en {index['seconds']:.1f}s "
+          f"({len(index['failures'])} échecs) -> {output_dir}")
+
+
+if __name__ == "__main__":
+    main()
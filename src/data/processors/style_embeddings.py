@@ -0,0 +1,103 @@
+# src/data/processors/style_embeddings.py
+import hashlib
+import json
+import numpy as np
+import torch
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from src.data.processors.font_processor import DESCRIPTIONS_PATH, load_font_descriptions
+
+# À incrémenter si le calcul des embeddings change (invalide le cache disque)
+STYLE_EMBEDDING_VERSION = 1
+
+class StyleEmbeddingTable:
+    """
+    Table d'embeddings de style construite à partir des tags des descriptions.
+
+    Chaque tag reçoit un vecteur déterministe (graine dérivée du tag) ; le
+    style d'une police est la somme normalisée des vecteurs de ses tags. La
+    matrice (num_fonts + 1, dim) est calculée une fois, mise en cache sur
+    disque selon le contenu des descriptions, et servie par indice : la ligne
+    0 correspond aux polices sans description.
+    """
+
+    def __init__(self, descriptions: Dict[str, Dict], dim: int = 256, cache_dir: Optional[Path] = None):
+        self.dim = dim
+        self.font_names: List[str] = sorted(descriptions)
+        self.font_ids = {name: i + 1 for i, name in enumerate(self.font_names)}
+        self.vocabulary: List[str] = sorted({tag for d in descriptions.values() for tag in self._tags(d)})
+        self.tag_ids = {tag: i for i, tag in enumerate(self.vocabulary)}
+        self._memo: Dict[tuple, torch.Tensor] = {}
+
+        content = json.dumps(descriptions, sort_keys=True)
+        self.key = hashlib.sha256(f"{content}-{dim}-v{STYLE_EMBEDDING_VERSION}".encode()).hexdigest()[:16]
+
+        cache_path = Path(cache_dir) / f"style-{self.key}.npy" if cache_dir else None
+        if cache_path is not None and cache_path.exists():
+            matrix = np.load(cache_path)
+        else:
+            matrix = self._build_matrix(descriptions)
+            if cache_path is not None:
+                cache_path.parent.mkdir(parents=True, exist_ok=True)
+                np.save(cache_path, matrix)
+        self.matrix = torch.from_numpy(matrix)
+
+    @classmethod
+    def from_yaml(cls, path: Path = DESCRIPTIONS_PATH, **kwargs) -> 'StyleEmbeddingTable':
+        return cls(load_font_descriptions(path), **kwargs)
+
+    @staticmethod
+    def _tags(description: Optional[Dict]) -> List[str]:
+        """Tags d'une description ; une entrée vide ou `tags: null` n'en a aucun"""
+        return (description or {}).get('tags') or []
+
+    def _tag_vector(self, tag: str) -> np.ndarray:
+        """Vecteur pseudo-aléatoire mais stable d'un tag"""
+        seed = int.from_bytes(hashlib.sha256(tag.encode()).digest()[:8], 'little')
+        return np.random.default_rng(seed).standard_normal(self.dim).astype(np.float32)
+
+    def _combine(self, tag_vectors: np.ndarray, multi_hot: np.ndarray) -> np.ndarray:
+        """Somme des vecteurs des tags de chaque ligne, normalisée (zéro sans tag)"""
+        summed = multi_hot @ tag_vectors
+        norms = np.linalg.norm(summed, axis=-1, keepdims=True)
+        return np.divide(summed, norms, out=np.zeros_like(summed), where=norms > 0)
+
+    def _build_matrix(self, descriptions: Dict[str, Dict]) -> np.ndarray:
+        tag_vectors = np.stack([self._tag_vector(tag) for tag in self.vocabulary]) \
+            if self.vocabulary else np.zeros((0, self.dim), dtype=np.float32)
+        multi_hot = np.zeros((len(self.font_names) + 1, len(self.vocabulary)), dtype=np.float32)
+        for name, row in self.font_ids.items():
+            for tag in self._tags(descriptions[name]):
+                multi_hot[row, self.tag_ids[tag]] = 1.0
+        return self._combine(tag_vectors, multi_hot).astype(np.float32)
+
+    def font_id(self, font_name: str) -> int:
+        """Indice de la police dans la table, 0 si elle n'a pas de description"""
+        return self.font_ids.get(font_name, 0)
+
+    def lookup(self, style_ids: torch.Tensor) -> torch.Tensor:
+        """Embeddings d'un batch d'indices, (B,) -> (B, dim)"""
+        return self.matrix.index_select(0, style_ids.to(torch.long).cpu())
+
+    def embed(self, description: Dict) -> torch.Tensor:
+        """Embedding d'une description quelconque, mémorisé par ensemble de tags"""
+        tags = tuple(sorted(set(self._tags(description))))
+        if tags not in self._memo:
+            tag_vectors = np.stack([self._tag_vector(tag) for tag in tags]) \
+                if tags else np.zeros((0, self.dim), dtype=np.float32)
+            self._memo[tags] = torch.from_numpy(self._combine(tag_vectors, np.ones((1, len(tags)), dtype=np.float32))[0])
+        return self._memo[tags]
+
+
+if __name__ == "__main__":
+    # Test de la table
+    table = StyleEmbeddingTable.from_yaml(cache_dir=Path('data/cache'))
+    print(f"Vocabulaire ({len(table.vocabulary)} tags) : {', '.join(table.vocabulary)}")
+    print(f"Matrice : {tuple(table.matrix.shape)}, clé {table.key}")
+
+    ids = torch.tensor([table.font_id(name) for name in table.font_names] + [0])
+    embeddings = table.lookup(ids)
+    print(f"Lookup de {len(ids)} indices : {tuple(embeddings.shape)}")
+    for name in table.font_names:
+        print(f"  {name} -> ligne {table.font_id(name)}")
@@ -1,14 +1,46 @@
 # src/data/processors/tensor_processor.py
+import logging
+import numpy as np
 import torch
-from typing import Dict, List
+from typing import Dict, List, Optional, Tuple
 from pathlib import Path
 from fontTools.ttLib import TTFont
 
-class TensorProcessor:
-    """Processeur pour convertir les données de police en tenseurs"""
+from src.data.instrumentation import Instrumentation, get_instrumentation
+from src.data.processors.charset import Charset
+from src.data.processors.glyph_index import GlyphIndex
+from src.data.processors.normalization import FONT_STATS_FIELDS, font_statistics
+from src.data.processors.style_embeddings import StyleEmbeddingTable
+
+logger = logging.getLogger(__name__)
+
+# À incrémenter dès que la sortie de process_font_to_tensor change (invalide le cache)
+PROCESSOR_VERSION = 4
 
-    def __init__(self):
-        self.device = torch.device("mps" if torch.backends.mps.is_available() else "cpu")
+class TensorProcessor:
+    """
+    Processeur pour convertir les données de police en tenseurs.
+
+    Les tenseurs produits restent sur CPU : ils peuvent ainsi être renvoyés
+    par les workers du DataLoader, et le transfert vers l'accélérateur se fait
+    une fois par batch (voir glyph_dataset.transfer_batch).
+
+    Les points restent en unités de la police ; les statistiques de la
+    police (`font_stats`) permettent de les normaliser au collate (voir
+    normalization.GlyphNormalizer).
+
+    Avec un Charset, seuls les glyphes de ses caractères sont traités, dans
+    l'ordre des codepoints : toutes les polices ont alors len(charset) lignes
+    alignées, les caractères absents ayant une longueur nulle et
+    `glyph_present` à False.
+    """
+
+    def __init__(self, style_embeddings: Optional[StyleEmbeddingTable] = None,
+                 instrumentation: Optional[Instrumentation] = None, charset: Optional[Charset] = None):
+        # Sans table fournie, les tags restent embeddés de façon déterministe
+        self.style_embeddings = style_embeddings or StyleEmbeddingTable({})
+        self.instrumentation = instrumentation or get_instrumentation()
+        self.charset = charset
 
     def process_font_to_tensor(self, font_data: Dict) -> Dict[str, torch.Tensor]:
         """
@@ -20,95 +52,99 @@ class TensorProcessor:
         Returns:
             Dict contenant les tenseurs pour l'entraînement
         """
+        with self.instrumentation.timer('tensor.convert_glyphs'):
+            glyphs, lengths, present = self._convert_glyphs_to_tensor(font_data['font'])
+        self.instrumentation.count('tensor.fonts')
         return {
-            'glyphs': self._convert_glyphs_to_tensor(font_data['font']),
+            'glyphs': glyphs,
+            'glyph_lengths': lengths,
+            'glyph_present': present,
+            'font_stats': self._compute_font_stats(font_data['font'], glyphs, lengths),
+            'glyph_mask': self._create_glyph_mask(glyphs, lengths),
             'style_embedding': self._create_style_embedding(font_data.get('description', {})),
             'variations': self._convert_variations_to_tensor(font_data.get('variation_axes', []))
         }
 
-    def _convert_glyphs_to_tensor(self, font: TTFont) -> torch.Tensor:
-        """Convertit tous les glyphes en un seul tenseur avec padding"""
-        glyph_tensors = []
-        max_points = 0
-
-        # Stocker la référence à la table glyf
-        self.glyf_table = font['glyf']
-        print(f"\nNombre total de glyphes: {len(self.glyf_table.glyphs)}")
-
-        for glyph_name in self.glyf_table.glyphs:
-            try:
-                glyph = self.glyf_table[glyph_name]
-                if glyph.numberOfContours > 0:
-                    points = self._normalize_points(glyph)
-                    max_points = max(max_points, len(points))
-            except Exception:
-                continue
-
-        print(f"Taille maximum de points trouvée: {max_points}")
-
-        # Deuxième passage pour créer des tenseurs uniformes
-        for glyph_name in self.glyf_table.glyphs:
-            try:
-                glyph = self.glyf_table[glyph_name]
-                if glyph.numberOfContours > 0:
-                    points = self._normalize_points(glyph)
-                    if points:
-                        # Padding avec des zéros
-                        padded_points = points + [0.0] * (max_points - len(points))
-                        glyph_tensors.append(torch.tensor(padded_points, dtype=torch.float32))
-            except Exception as e:
-                print(f"Erreur avec le glyphe {glyph_name}: {str(e)}")
-                continue
-
-        print(f"Nombre de glyphes traités avec succès: {len(glyph_tensors)}")
-
-        if glyph_tensors:
-            return torch.stack(glyph_tensors).to(self.device)
-        return torch.tensor([]).to(self.device)
-
-    def _normalize_points(self, glyph) -> List[float]:
-        """Normalise les points du glyphe entre -1 et 1"""
-        try:
-            points = []
-            if hasattr(glyph, 'numberOfContours') and glyph.numberOfContours > 0:
-                # Obtenir les coordonnées
-                coordinates = glyph.getCoordinates(self.glyf_table)
-                # coordinates est un tuple (points, endPts)
-                coords = coordinates[0]  # Prendre juste les points
-
-                # Traiter chaque coordonnée
-                for coord in coords:
-                    x, y = coord  # Maintenant on peut unpack correctement
-                    points.extend([float(x)/1000.0, float(y)/1000.0])
-
-                return points
-            return []
-
-        except Exception as e:
-            print(f"Erreur de normalisation détaillée: {str(e)}")
-            return []
+    def _convert_glyphs_to_tensor(self, font: TTFont) -> Tuple[torch.Tensor, torch.Tensor, torch.Tensor]:
+        """
+        Convertit les glyphes non vides (ou ceux du charset) en un seul tenseur avec padding.
 
+        Les glyphes passent par un GlyphIndex : chaque contour n'est lu qu'une
+        fois et les composites (accents, ligatures...) sont résolus en
+        références transformées vers leurs composants, puis tous les glyphes
+        sont développés en un seul passage vectorisé.
 
+        Returns:
+            Tuple (glyphes, longueurs, présence) : le tenseur paddé des points
+            (en unités de la police), le nombre de points réels de chaque
+            glyphe et le masque des caractères présents dans la cmap (tout
+            à True sans charset). Les glyphes vides sont
+            comptés comme ignorés, les erreurs comme échecs, dans
+            l'instrumentation (agrégés par police, pas de sortie par glyphe).
+        """
+        index = GlyphIndex()
+        if self.charset is not None:
+            # Seuls les glyphes du charset (et leurs composants) sont résolus
+            glyph_names, present = self.charset.select(font)
+            result = index.add_font(font, glyph_names)
+            self.instrumentation.count('tensor.glyphs.missing', int((~present).sum()))
+        else:
+            result = index.add_font(font)
+            present = np.ones(len(result['glyph_ids']), dtype=bool)
+        for glyph_name, error in result['failed']:
+            self.instrumentation.failure('tensor.glyphs', glyph_name, error)
+
+        glyphs, lengths = index.expand(result['glyph_ids'])
+        count = len(lengths)
+        glyf_table = font['glyf']
+        converted = [name for name, glyph_id in zip(result['names'], result['glyph_ids']) if glyph_id >= 0]
+        composites = sum(glyf_table[name].isComposite() for name in converted)
+        self.instrumentation.count('tensor.glyphs.processed', len(converted))
+        self.instrumentation.count('tensor.glyphs.composite', composites)
+        self.instrumentation.count('tensor.glyphs.skipped', result['skipped'])
+        self.instrumentation.observe('tensor.points_per_glyph', lengths[lengths > 0])
+        logger.debug("%d glyphes convertis (%d composites), %d points au maximum",
+                     len(converted), composites, glyphs.shape[1] if count else 0)
+
+        if count == 0:
+            return torch.tensor([]), torch.tensor([], dtype=torch.long), torch.tensor([], dtype=torch.bool)
+        return torch.from_numpy(glyphs), torch.from_numpy(lengths), torch.from_numpy(present)
+
+    def _create_glyph_mask(self, glyphs: torch.Tensor, lengths: torch.Tensor) -> torch.Tensor:
+        """Masque booléen (num_glyphs, max_points) des points réels, False sur le padding"""
+        if glyphs.dim() < 3:
+            return torch.zeros((0, 0), dtype=torch.bool)
+        positions = torch.arange(glyphs.shape[1])
+        return positions.unsqueeze(0) < lengths.unsqueeze(1)
+
+    def _compute_font_stats(self, font: TTFont, glyphs: torch.Tensor, lengths: torch.Tensor) -> torch.Tensor:
+        """Statistiques de normalisation de la police (FONT_STATS_FIELDS), sur tous ses points réels"""
+        if glyphs.dim() < 3:
+            return torch.from_numpy(font_statistics(font, np.zeros((0, 2), dtype=np.float32)))
+        mask = self._create_glyph_mask(glyphs, lengths)
+        return torch.from_numpy(font_statistics(font, glyphs[mask].numpy()))
 
     def _create_style_embedding(self, description: Dict) -> torch.Tensor:
-        """
-        Crée un embedding à partir de la description.
-        Pour l'instant un simple vecteur aléatoire, à améliorer plus tard.
-        """
-        return torch.randn(256).to(self.device)
+        """Crée un embedding déterministe à partir des tags de la description"""
+        return self.style_embeddings.embed(description)
 
     def _convert_variations_to_tensor(self, axes: List) -> torch.Tensor:
-        """Convertit les axes de variation en tenseur"""
+        """
+        Convertit les axes de variation en tenseur (min, défaut, max par axe).
+
+        Les valeurs restent en coordonnées utilisateur (wght 100-900, wdth
+        75-125...) : elles n'ont pas de rapport avec l'em de la police.
+        """
         variations = []
         for axis in axes:
             variations.extend([
-                axis['min_value']/1000,
-                axis['default_value']/1000,
-                axis['max_value']/1000
+                axis['min_value'],
+                axis['default_value'],
+                axis['max_value']
             ])
         if not variations:
             variations = [0.0]
-        return torch.tensor(variations, dtype=torch.float32).to(self.device)
+        return torch.tensor(variations, dtype=torch.float32)
 
 if __name__ == "__main__":
     # Test du processor
@@ -123,6 +159,9 @@ if __name__ == "__main__":
         
         # Print first glyph tensor
         if tensor_data['glyphs'].shape[0] > 0:
-            first_glyph = tensor_data['glyphs'][4].cpu().numpy()
-            print("\nPremier glyphe (276 points) :")
-            print(first_glyph)
\ No newline at end of file
+            length = int(tensor_data['glyph_lengths'][4])
+            first_glyph = tensor_data['glyphs'][4, :length].numpy()
+            print(f"\nPremier glyphe ({length} points) :")
+            print(first_glyph)
+        print(f"\nStatistiques : {dict(zip(FONT_STATS_FIELDS, tensor_data['font_stats'].tolist()))}")
+        print(f"\nMétriques : {tensor_processor.instrumentation.snapshot()}")
\ No newline at end of file
@@ -0,0 +1,300 @@
+# src/data/processors/variation_sampler.py
+import numpy as np
+import torch
+from fontTools.ttLib import TTFont
+from fontTools.ttLib.tables._g_l_y_f import SCALED_COMPONENT_OFFSET, SCALE_COMPONENT_OFFSET_DEFAULT, \
+    UNSCALED_COMPONENT_OFFSET
+from fontTools.varLib.iup import iup_delta
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple, Union
+
+from src.data.processors.charset import Charset
+from src.data.processors.glyph_index import GlyphIndex
+
+class VariationSampler:
+    """
+    Génère les glyphes d'une police variable à de nombreuses positions d'axes.
+
+    Les deltas `gvar` sont précalculés une fois en une matrice dense
+    (num_regions, num_points, 2) ; une position d'axes se réduit alors à un
+    vecteur de coefficients par région, et toutes les positions sont
+    interpolées en un seul produit matriciel.
+
+    Les glyphes sont ceux de TensorProcessor, dans le même ordre : sélection
+    par GlyphIndex.add_font (et Charset.select avec un charset), composites
+    compris, leurs points étant ceux des composants transformés. À la
+    position par défaut, `sample` donne exactement les glyphes de
+    TensorProcessor.
+    """
+
+    def __init__(self, font: TTFont, charset: Optional[Charset] = None):
+        if 'fvar' not in font or 'gvar' not in font:
+            raise ValueError("La police n'est pas une police variable TrueType (fvar/gvar absents)")
+
+        self.axes = [{
+            'tag': axis.axisTag,
+            'min_value': axis.minValue,
+            'default_value': axis.defaultValue,
+            'max_value': axis.maxValue
+        } for axis in font['fvar'].axes]
+        self.axis_tags = [axis['tag'] for axis in self.axes]
+
+        # Mappings avar éventuels, sous forme de points pour np.interp
+        self.avar_maps = {}
+        if 'avar' in font:
+            for tag, mapping in font['avar'].segments.items():
+                if mapping:
+                    keys = sorted(mapping)
+                    self.avar_maps[tag] = (np.array(keys), np.array([mapping[k] for k in keys]))
+
+        self.charset = charset
+        self._precompute_deltas(font)
+
+    @classmethod
+    def from_path(cls, font_path: Path, charset: Optional[Charset] = None) -> 'VariationSampler':
+        return cls(TTFont(font_path), charset)
+
+    def _precompute_deltas(self, font: TTFont) -> None:
+        """Empile les points par défaut et les deltas de chaque région en tableaux denses"""
+        glyf_table = font['glyf']
+        variations = font['gvar'].variations
+
+        # Mêmes glyphes et même ordre que TensorProcessor (-1 : absent, vide ou en échec)
+        if self.charset is not None:
+            glyph_names, self.present = self.charset.select(font)
+            result = GlyphIndex().add_font(font, glyph_names)
+        else:
+            result = GlyphIndex().add_font(font)
+            self.present = np.ones(len(result['glyph_ids']), dtype=bool)
+        self.glyph_names: List[Optional[str]] = result['names']
+
+        resolved: Dict[str, Tuple[np.ndarray, Dict[tuple, np.ndarray]]] = {}
+        base = []
+        glyph_deltas = []  # Par glyphe : {clé de région: deltas (n, 2)}
+        for glyph_name, glyph_id in zip(result['names'], result['glyph_ids']):
+            if glyph_id < 0:
+                base.append(np.zeros((0, 2), dtype=np.float32))
+                glyph_deltas.append({})
+                continue
+            points, deltas = self._resolve(glyf_table, variations, glyph_name, resolved)
+            base.append(points.astype(np.float32))
+            glyph_deltas.append(deltas)
+
+        region_index: Dict[tuple, int] = {}
+        for deltas in glyph_deltas:
+            for key in deltas:
+                region_index.setdefault(key, len(region_index))
+
+        self.lengths = np.array([len(points) for points in base], dtype=np.int64)
+        self.point_offsets = np.concatenate([[0], np.cumsum(self.lengths)]).astype(np.int64)
+        self.base = np.concatenate(base) if base else np.zeros((0, 2), dtype=np.float32)
+
+        self.regions = list(region_index)
+        self.deltas = np.zeros((len(self.regions), len(self.base), 2), dtype=np.float32)
+        for glyph_idx, deltas in enumerate(glyph_deltas):
+            start, stop = self.point_offsets[glyph_idx], self.point_offsets[glyph_idx + 1]
+            for key, delta in deltas.items():
+                self.deltas[region_index[key], start:stop] += delta
+
+        # Supports des régions en tableaux (num_regions, num_axes) pour le calcul vectorisé
+        shape = (len(self.regions), len(self.axis_tags))
+        self.region_start = np.zeros(shape)
+        self.region_peak = np.zeros(shape)
+        self.region_end = np.zeros(shape)
+        for r, key in enumerate(self.regions):
+            for tag, (start, peak, end) in key:
+                if tag in self.axis_tags:
+                    a = self.axis_tags.index(tag)
+                    self.region_start[r, a], self.region_peak[r, a], self.region_end[r, a] = start, peak, end
+
+    def _resolve(self, glyf_table, variations, glyph_name: str,
+                 resolved: Dict[str, Tuple[np.ndarray, Dict[tuple, np.ndarray]]],
+                 depth: int = 0) -> Tuple[np.ndarray, Dict[tuple, np.ndarray]]:
+        """
+        Points par défaut (n, 2) d'un glyphe et ses deltas par région, dans
+        l'ordre de GlyphIndex.expand.
+
+        Les deltas d'un composite sont ceux de ses composants, transformés,
+        plus les deltas de décalage de chaque composant portés par le gvar
+        du composite lui-même.
+        """
+        if glyph_name in resolved:
+            return resolved[glyph_name]
+        if depth > 32:
+            raise ValueError(f"Référence de composant récursive dans {glyph_name}")
+
+        glyph = glyf_table[glyph_name]
+        points = np.zeros((0, 2))
+        deltas: Dict[tuple, np.ndarray] = {}
+        if glyph.numberOfContours > 0:
+            points = np.frombuffer(glyph.coordinates.array, dtype=np.float64).reshape(-1, 2)
+            n = len(points)
+            # L'IUP attend aussi les 4 points fantômes des métriques, ignorés ensuite
+            orig_coords = [tuple(p) for p in points.tolist()] + [(0, 0)] * 4
+            for variation in variations.get(glyph_name, []):
+                coordinates = variation.coordinates
+                if any(c is None for c in coordinates):
+                    coordinates = iup_delta(coordinates, orig_coords, list(glyph.endPtsOfContours))
+                key = tuple(sorted(variation.axes.items()))
+                deltas[key] = deltas.get(key, 0) + np.asarray(coordinates[:n], dtype=np.float64)
+        elif glyph.isComposite():
+            if any(hasattr(component, 'firstPt') for component in glyph.components):
+                # Placement par points d'ancrage : aplati comme dans GlyphIndex, sans deltas
+                coordinates, _, _ = glyph.getCoordinates(glyf_table)
+                points = np.frombuffer(coordinates.array, dtype=np.float64).reshape(-1, 2)
+            else:
+                # Deltas des décalages de composants (les points fantômes suivent)
+                offset_deltas = []
+                for variation in variations.get(glyph_name, []):
+                    moves = [(0, 0) if c is None else c for c in variation.coordinates[:len(glyph.components)]]
+                    offset_deltas.append((tuple(sorted(variation.axes.items())), np.asarray(moves, dtype=np.float64)))
+
+                parts = []
+                part_deltas = []
+                for i, component in enumerate(glyph.components):
+                    matrix = np.array(getattr(component, 'transform', [[1.0, 0.0], [0.0, 1.0]]), dtype=np.float64)
+                    move = np.array([component.x, component.y], dtype=np.float64)
+                    scaled = False
+                    if hasattr(component, 'transform'):
+                        scaled = component.flags & SCALED_COMPONENT_OFFSET
+                        if not scaled and not component.flags & UNSCALED_COMPONENT_OFFSET:
+                            scaled = SCALE_COMPONENT_OFFSET_DEFAULT
+                    if scaled:
+                        # Convention Apple : le décalage est lui aussi transformé
+                        move = move @ matrix
+                    child_points, child_deltas = self._resolve(glyf_table, variations, component.glyphName,
+                                                               resolved, depth + 1)
+                    parts.append(child_points @ matrix + move)
+                    component_deltas = {key: delta @ matrix for key, delta in child_deltas.items()}
+                    for key, moves in offset_deltas:
+                        shift = moves[i] @ matrix if scaled else moves[i]
+                        component_deltas[key] = component_deltas.get(key, 0) + np.broadcast_to(
+                            shift, child_points.shape)
+                    part_deltas.append(component_deltas)
+
+                points = np.concatenate(parts) if parts else points
+                keys = dict.fromkeys(key for component_deltas in part_deltas for key in component_deltas)
+                deltas = {key: np.concatenate([component_deltas.get(key, np.zeros_like(part))
+                                               for part, component_deltas in zip(parts, part_deltas)])
+                          for key in keys}
+
+        resolved[glyph_name] = (points, deltas)
+        return resolved[glyph_name]
+
+    def grid_locations(self, steps: Union[int, Dict[str, int]]) -> np.ndarray:
+        """
+        Grille régulière de positions entre min_value et max_value de chaque axe.
+
+        Args:
+            steps: Nombre de pas par axe, global ou par tag d'axe
+
+        Returns:
+            Tableau (num_locations, num_axes) en coordonnées utilisateur
+        """
+        ranges = []
+        for axis in self.axes:
+            count = steps.get(axis['tag'], 1) if isinstance(steps, dict) else steps
+            if count <= 1:
+                ranges.append(np.array([axis['default_value']]))
+            else:
+                ranges.append(np.linspace(axis['min_value'], axis['max_value'], count))
+        mesh = np.meshgrid(*ranges, indexing='ij')
+        return np.stack([m.ravel() for m in mesh], axis=-1)
+
+    def random_locations(self, count: int, seed: Optional[int] = None) -> np.ndarray:
+        """Positions tirées uniformément dans l'espace de design, (count, num_axes)"""
+        rng = np.random.default_rng(seed)
+        low = np.array([axis['min_value'] for axis in self.axes])
+        high = np.array([axis['max_value'] for axis in self.axes])
+        return rng.uniform(low, high, size=(count, len(self.axes)))
+
+    def normalize_locations(self, locations: np.ndarray) -> np.ndarray:
+        """Convertit des positions utilisateur en coordonnées normalisées [-1, 1], avar compris"""
+        locations = np.atleast_2d(np.asarray(locations, dtype=np.float64))
+        normalized = np.zeros_like(locations)
+        for a, axis in enumerate(self.axes):
+            v = np.clip(locations[:, a], axis['min_value'], axis['max_value'])
+            default = axis['default_value']
+            below = (v - default) / (default - axis['min_value']) if default > axis['min_value'] else 0.0
+            above = (v - default) / (axis['max_value'] - default) if axis['max_value'] > default else 0.0
+            normalized[:, a] = np.where(v < default, below, np.where(v > default, above, 0.0))
+            if axis['tag'] in self.avar_maps:
+                keys, values = self.avar_maps[axis['tag']]
+                normalized[:, a] = np.interp(normalized[:, a], keys, values)
+        return normalized
+
+    def region_scalars(self, normalized: np.ndarray) -> np.ndarray:
+        """Coefficient de chaque région à chaque position, (num_locations, num_regions)"""
+        v = normalized[:, None, :]
+        start, peak, end = self.region_start[None], self.region_peak[None], self.region_end[None]
+
+        # Axes sans effet sur la région : pic nul, support invalide ou à cheval sur 0
+        inactive = (peak == 0) | (start > peak) | (peak > end) | ((start < 0) & (end > 0))
+        with np.errstate(divide='ignore', invalid='ignore'):
+            rising = (v - start) / (peak - start)
+            falling = (v - end) / (peak - end)
+        factor = np.where(v < peak, rising, falling)
+        factor = np.where((v <= start) | (v >= end), 0.0, factor)
+        factor = np.where((v == peak) | inactive, 1.0, factor)
+        return np.prod(factor, axis=-1)
+
+    def sample(self, locations: np.ndarray, scale: float = 1.0) -> Dict[str, torch.Tensor]:
+        """
+        Interpole tous les glyphes à toutes les positions en une opération.
+
+        Args:
+            locations: Positions (num_locations, num_axes) en coordonnées utilisateur
+            scale: Diviseur appliqué aux coordonnées (1 : unités de la police,
+                comme TensorProcessor ; la normalisation se fait au collate)
+
+        Returns:
+            Dict avec `glyphs` (num_locations, num_glyphs, max_points, 2),
+            `glyph_lengths` (num_glyphs,), `glyph_present` (num_glyphs,) et
+            `locations` (num_locations, num_axes)
+        """
+        locations = np.atleast_2d(np.asarray(locations, dtype=np.float64))
+        scalars = self.region_scalars(self.normalize_locations(locations)).astype(np.float32)
+
+        # (L, R) x (R, P * 2) -> (L, P * 2)
+        flat_deltas = self.deltas.reshape(len(self.regions), -1)
+        packed = self.base.reshape(1, -1) + scalars @ flat_deltas
+        packed = packed.reshape(len(locations), -1, 2) / scale
+
+        max_points = int(self.lengths.max()) if len(self.lengths) else 0
+        mask = np.arange(max_points)[None, :] < self.lengths[:, None]
+        glyphs = np.zeros((len(locations), len(self.lengths), max_points, 2), dtype=np.float32)
+        glyphs[:, mask] = packed
+
+        return {
+            'glyphs': torch.from_numpy(glyphs),
+            'glyph_lengths': torch.from_numpy(self.lengths),
+            'glyph_present': torch.from_numpy(self.present),
+            'locations': torch.from_numpy(locations.astype(np.float32)),
+        }
+
+
+if __name__ == "__main__":
+    # Test du sampler, comparé à l'instancer de fontTools
+    import time
+    from fontTools.varLib import instancer
+
+    font_path = Path("data/fonts/train/RethinkSans-VariableFont_wght.ttf")
+
+    if font_path.exists():
+        start = time.perf_counter()
+        sampler = VariationSampler.from_path(font_path)
+        print(f"Précalcul : {len(sampler.glyph_names)} glyphes, {len(sampler.regions)} régions, "
+              f"{len(sampler.base)} points en {time.perf_counter() - start:.2f}s")
+
+        locations = sampler.grid_locations(64)
+        start = time.perf_counter()
+        result = sampler.sample(locations)
+        print(f"{len(locations)} instances : {tuple(result['glyphs'].shape)} "
+              f"en {(time.perf_counter() - start) * 1000:.1f} ms")
+
+        location = {'wght': 650}
+        instance = instancer.instantiateVariableFont(TTFont(font_path), location)
+        glyph_idx = sampler.glyph_names.index('A')
+        expected = np.array(instance['glyf']['A'].getCoordinates(instance['glyf'])[0])
+        actual = sampler.sample([[650]])['glyphs'][0, glyph_idx, :sampler.lengths[glyph_idx]].numpy()
+        print(f"Écart max avec l'instancer sur 'A' à wght=650 : {np.abs(expected - actual).max():.2f} unités")
@@ -0,0 +1,253 @@
+# src/inference/server.py
+"""
+Serveur HTTP de génération de glyphes, avec regroupement des requêtes en batches.
+
+Les points des requêtes et des réponses sont en unités de la police
+(`units_per_em`, 1000 par défaut). Le serveur les normalise comme à
+l'entraînement, avec les statistiques de corpus du manifeste des shards
+(`--normalization`), puis dénormalise les prédictions.
+
+Usage :
+    python -m src.inference.server --checkpoint models/typefacer.ckpt --port 8000 \
+        --normalization data/shards/train/manifest.json
+
+    curl -X POST localhost:8000/generate \
+        -d '{"points": [[100, 200], [300, 400]], "units_per_em": 1000, "style_id": 1}'
+"""
+import argparse
+import json
+import queue
+import threading
+import time
+import numpy as np
+import torch
+from concurrent.futures import Future
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Dict, Any, List, Optional
+
+from src.data.datasets.glyph_dataset import collate_glyphs, resolve_device, transfer_batch
+from src.data.processors.normalization import EM_CORPUS, FONT_STATS_FIELDS, UNITS_PER_EM, GlyphNormalizer
+from src.models.typefacer_model import TypeFacerModel
+
+class BatchCoalescer:
+    """
+    Regroupe les requêtes concurrentes en un seul forward.
+
+    Un thread dédié attend la première requête, puis collecte les suivantes
+    jusqu'à `max_batch_size` requêtes ou `max_latency_ms` écoulées, et
+    exécute un seul passage du modèle pour tout le batch.
+    """
+
+    def __init__(self, model: TypeFacerModel, max_batch_size: int = 32, max_latency_ms: float = 10.0,
+                 pad_multiple: int = 8, normalization: Optional[Dict[str, Any]] = None):
+        """
+        Args:
+            normalization: Statistiques de corpus de l'entraînement (`normalization`
+                du manifeste des shards) ; sans elles, les points sont seulement
+                ramenés en em
+        """
+        self.model = model.eval()
+        self.normalization = normalization or dict(EM_CORPUS)
+        self.max_batch_size = max_batch_size
+        self.max_latency = max_latency_ms / 1000.0
+        self.pad_multiple = pad_multiple
+        self.requests: queue.Queue = queue.Queue()
+        self.stats = {'requests': 0, 'batches': 0}
+        self._closed = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def submit(self, points: torch.Tensor, style_id: int = 0, units_per_em: float = 1000.0) -> Future:
+        """Ajoute une requête (points en unités de la police) ; le Future reçoit les points prédits (n, 2)"""
+        future: Future = Future()
+        self.requests.put((points, style_id, units_per_em, future))
+        return future
+
+    def close(self) -> None:
+        self._closed.set()
+        self._thread.join()
+
+    def _collect(self) -> List[tuple]:
+        """Attend une requête puis regroupe celles qui arrivent dans la fenêtre de latence"""
+        try:
+            batch = [self.requests.get(timeout=0.1)]
+        except queue.Empty:
+            return []
+
+        deadline = time.monotonic() + self.max_latency
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self.requests.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self) -> None:
+        while not self._closed.is_set():
+            batch = self._collect()
+            if not batch:
+                continue
+            try:
+                results = self._forward(batch)
+                for (*_, future), result in zip(batch, results):
+                    future.set_result(result)
+            except Exception as e:
+                for *_, future in batch:
+                    future.set_exception(e)
+
+    def _forward(self, batch: List[tuple]) -> List[np.ndarray]:
+        samples = [{
+            'points': points,
+            'length': len(points),
+            'font_index': i,
+            'glyph_index': i,
+            'style_id': style_id,
+        } for i, (points, style_id, _, _) in enumerate(batch)]
+        # Une « police » par requête : seule son échelle compte pour la normalisation
+        units_per_em = [request[2] for request in batch]
+        font_stats = np.zeros((len(batch), len(FONT_STATS_FIELDS)), dtype=np.float32)
+        font_stats[:, UNITS_PER_EM] = units_per_em
+        normalizer = GlyphNormalizer(font_stats, self.normalization)
+        inputs = collate_glyphs(samples, pad_multiple=self.pad_multiple, normalizer=normalizer)
+        lengths = inputs['lengths'].tolist()
+
+        device = self.model.device
+        if device.type == 'cuda':
+            # Un seul batch épinglé par forward : copie asynchrone vers le GPU
+            inputs = {key: value.pin_memory() for key, value in inputs.items()}
+        inputs = transfer_batch(inputs, device)
+        with torch.inference_mode():
+            prediction = self.model(inputs['points'], inputs['mask'], inputs['style_id']).float().cpu()
+
+        self.stats['requests'] += len(batch)
+        self.stats['batches'] += 1
+        return [GlyphNormalizer.denormalize(prediction[i, :length].numpy(), units_per_em[i], self.normalization)
+                for i, length in enumerate(lengths)]
+
+
+def load_model(checkpoint: Path, model_config: Path = Path('configs/model/default.yaml')) -> TypeFacerModel:
+    """
+    Charge le modèle une seule fois, depuis un checkpoint Lightning (.ckpt) ou
+    un state_dict (.pth) combiné à la config du modèle.
+    """
+    if checkpoint.suffix == '.ckpt':
+        return TypeFacerModel.load_from_checkpoint(checkpoint, map_location='cpu')
+
+    state_dict = torch.load(checkpoint, map_location='cpu')
+    num_styles = state_dict['style_embedding.weight'].shape[0] if 'style_embedding.weight' in state_dict else 1
+    model = TypeFacerModel.from_config(model_config, num_styles=num_styles)
+    model.load_state_dict(state_dict)
+    return model
+
+
+def make_handler(coalescer: BatchCoalescer, timeout: float = 30.0, max_points: int = 2048):
+    """
+    Crée la classe de handler HTTP liée au coalescer.
+
+    Les glyphes de plus de `max_points` points sont refusés (400) avant
+    d'entrer dans un batch, dont ils feraient échouer toutes les requêtes.
+    """
+
+    num_styles = coalescer.model.style_embedding.num_embeddings
+
+    class GenerationHandler(BaseHTTPRequestHandler):
+        def _send_json(self, status: int, payload: Dict[str, Any]) -> None:
+            body = json.dumps(payload).encode()
+            self.send_response(status)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_GET(self):
+            if self.path == '/health':
+                self._send_json(200, {'status': 'ok', **coalescer.stats})
+            else:
+                self._send_json(404, {'error': f"Route inconnue: {self.path}"})
+
+        def do_POST(self):
+            if self.path != '/generate':
+                self._send_json(404, {'error': f"Route inconnue: {self.path}"})
+                return
+            try:
+                length = int(self.headers.get('Content-Length', 0))
+                request = json.loads(self.rfile.read(length) or b'{}')
+                if not isinstance(request, dict):
+                    raise ValueError("Le corps de la requête doit être un objet JSON")
+                units_per_em = float(request.get('units_per_em', 1000))
+                if not np.isfinite(units_per_em) or units_per_em <= 0:
+                    raise ValueError("units_per_em doit être strictement positif")
+                if 'points' in request:
+                    points = torch.tensor(request['points'], dtype=torch.float32).reshape(-1, 2)
+                    num_points = len(points)
+                elif 'num_points' in request:
+                    num_points = int(request['num_points'])
+                else:
+                    raise ValueError("La requête doit contenir 'points' ou 'num_points'")
+                if num_points <= 0:
+                    raise ValueError("Le glyphe doit contenir au moins un point")
+                if num_points > max_points:
+                    raise ValueError(f"Le glyphe dépasse {max_points} points ({num_points})")
+                if 'points' not in request:
+                    # Génération depuis du bruit, à l'échelle de la police
+                    points = 0.1 * units_per_em * torch.randn(num_points, 2)
+                style_id = int(request.get('style_id', 0))
+                if not 0 <= style_id < num_styles:
+                    raise ValueError(f"style_id doit être compris entre 0 et {num_styles - 1}")
+            except (ValueError, TypeError, RuntimeError) as e:
+                self._send_json(400, {'error': str(e)})
+                return
+
+            try:
+                result = coalescer.submit(points, style_id, units_per_em).result(timeout=timeout)
+            except Exception as e:
+                self._send_json(500, {'error': f"{type(e).__name__}: {e}"})
+                return
+            self._send_json(200, {'points': result.tolist()})
+
+        def log_message(self, format, *args):
+            # Pas de log par requête : trop coûteux sous forte charge
+            pass
+
+    return GenerationHandler
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Serveur de génération de glyphes")
+    parser.add_argument('--checkpoint', type=Path, required=True)
+    parser.add_argument('--model-config', type=Path, default=Path('configs/model/default.yaml'))
+    parser.add_argument('--host', default='0.0.0.0')
+    parser.add_argument('--port', type=int, default=8000)
+    parser.add_argument('--device', default='auto', help="cpu, cuda, mps ou auto")
+    parser.add_argument('--max-batch-size', type=int, default=32)
+    parser.add_argument('--max-latency-ms', type=float, default=10.0)
+    parser.add_argument('--max-points', type=int, default=2048, help="Nombre maximum de points par glyphe")
+    parser.add_argument('--normalization', type=Path, default=None,
+                        help="Manifeste des shards dont reprendre la normalisation du corpus")
+    args = parser.parse_args(argv)
+
+    normalization = None
+    if args.normalization:
+        with open(args.normalization) as f:
+            normalization = json.load(f)['normalization']
+
+    model = load_model(args.checkpoint, args.model_config).to(resolve_device(args.device))
+    coalescer = BatchCoalescer(model, args.max_batch_size, args.max_latency_ms, normalization=normalization)
+    server = ThreadingHTTPServer((args.host, args.port), make_handler(coalescer, max_points=args.max_points))
+    print(f"Serveur prêt sur http://{args.host}:{args.port} "
+          f"(batch max {args.max_batch_size}, latence max {args.max_latency_ms} ms)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        coalescer.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+# src/models/train.py
+"""
+Entraînement de TypeFacerModel.
+
+Usage :
+    python -m src.models.train --data-config configs/data/default.yaml --model-config configs/model/default.yaml
+"""
+import argparse
+import logging
+import torch
+import yaml
+from pathlib import Path
+from typing import List, Optional
+
+from src.data.datasets.glyph_dataset import create_dataloader, resolve_device
+from src.data.processors.font_processor import FontProcessor
+from src.data.processors.style_embeddings import StyleEmbeddingTable
+from src.models.typefacer_model import TypeFacerModel, create_trainer
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Entraînement de TypeFacer")
+    parser.add_argument('--data-config', type=Path, default=Path('configs/data/default.yaml'))
+    parser.add_argument('--model-config', type=Path, default=Path('configs/model/default.yaml'))
+    parser.add_argument('--compile', action='store_true', help="Active torch.compile sur l'encodeur")
+    parser.add_argument('--fast-dev-run', action='store_true', help="Un seul batch d'entraînement et de validation")
+    parser.add_argument('--log-level', default='INFO')
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=args.log_level.upper(), format='%(asctime)s %(levelname)s %(name)s %(message)s')
+
+    with open(args.data_config) as f:
+        data_config = yaml.safe_load(f)['data']
+    with open(args.model_config) as f:
+        model_config = yaml.safe_load(f)['model']
+
+    style_table = StyleEmbeddingTable(
+        FontProcessor().font_descriptions,
+        dim=model_config['hidden_dim'],
+        cache_dir=Path(data_config['cache_dir']) if data_config.get('cache_dir') else None)
+
+    overrides = {'num_styles': len(style_table.font_names) + 1}
+    if args.compile:
+        overrides['compile'] = True
+    model = TypeFacerModel.from_config(args.model_config, **overrides)
+    # Les embeddings de style partent de la table précalculée, puis sont appris
+    with torch.no_grad():
+        model.style_embedding.weight.copy_(style_table.matrix)
+
+    # Longueurs arrondies à 8 : moins de formes distinctes à recompiler
+    shards_dir = Path(data_config.get('shards_dir', 'data/shards'))
+    loader_args = {'pad_multiple': 8, 'batch_size': model_config['batch_size']}
+
+    def loader(split):
+        # Shards memory-mappés s'ils ont été produits par l'ingestion, sinon cache des polices
+        sharded = (shards_dir / split / 'manifest.json').exists()
+        bucketed = sharded or bool(data_config.get('cache_dir'))
+        return create_dataloader(args.data_config, split, sharded=sharded, bucketed=bucketed, **loader_args)
+
+    train_loader = loader('train')
+    val_loader = None
+    if Path(data_config['val_dir']).exists():
+        val_loader = loader('val')
+
+    # Lightning transfère chaque batch (épinglé par le DataLoader) vers ce device
+    accelerator = resolve_device(data_config.get('device', 'auto')).type
+    trainer = create_trainer(args.model_config, fast_dev_run=args.fast_dev_run, accelerator=accelerator)
+    trainer.fit(model, train_loader, val_loader)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,140 @@
+# src/models/typefacer_model.py
+import math
+import lightning as L
+import torch
+import yaml
+from pathlib import Path
+from torch import nn
+from typing import Dict, Any, Optional
+
+class TypeFacerModel(L.LightningModule):
+    """
+    Modèle de débruitage de contours conditionné par le style.
+
+    Les points d'un glyphe sont projetés, enrichis d'un encodage de position
+    et de l'embedding de style de la police, puis passés dans un encodeur
+    Transformer qui prédit les points propres. Les points de padding sont
+    masqués dans l'attention et exclus de la loss.
+    """
+
+    def __init__(self, hidden_dim: int = 256, learning_rate: float = 1e-3, num_layers: int = 4,
+                 num_heads: int = 8, num_styles: int = 1, noise_std: float = 0.01,
+                 compile: bool = False, **kwargs):
+        super().__init__()
+        self.save_hyperparameters()
+
+        self.point_projection = nn.Linear(2, hidden_dim)
+        self.style_embedding = nn.Embedding(num_styles, hidden_dim)
+        self.encoder = nn.TransformerEncoder(
+            nn.TransformerEncoderLayer(hidden_dim, num_heads, dim_feedforward=4 * hidden_dim,
+                                       dropout=0.0, batch_first=True, norm_first=True),
+            num_layers,
+            enable_nested_tensor=False,
+        )
+        self.output_projection = nn.Linear(hidden_dim, 2)
+
+    @classmethod
+    def from_config(cls, config_path: Path = Path('configs/model/default.yaml'), **overrides) -> 'TypeFacerModel':
+        """Construit le modèle à partir de la config (hidden_dim, learning_rate, ...)"""
+        with open(config_path) as f:
+            config = yaml.safe_load(f)['model']
+        config.update(overrides)
+        return cls(**config)
+
+    def configure_model(self) -> None:
+        # Compilation de l'encodeur, avec formes dynamiques car la longueur varie d'un batch à l'autre
+        if self.hparams.compile and not hasattr(self.encoder, '_orig_mod'):
+            self.encoder = torch.compile(self.encoder, dynamic=True)
+
+    def _positional_encoding(self, length: int) -> torch.Tensor:
+        """Encodage sinusoïdal (length, hidden_dim)"""
+        dim = self.hparams.hidden_dim
+        position = torch.arange(length, device=self.device, dtype=torch.float32).unsqueeze(1)
+        frequencies = torch.exp(torch.arange(0, dim, 2, device=self.device, dtype=torch.float32)
+                                * (-math.log(10000.0) / dim))
+        encoding = torch.zeros(length, dim, device=self.device)
+        encoding[:, 0::2] = torch.sin(position * frequencies)
+        encoding[:, 1::2] = torch.cos(position * frequencies[:dim // 2])
+        return encoding
+
+    def forward(self, points: torch.Tensor, mask: torch.Tensor, style_id: Optional[torch.Tensor] = None) -> torch.Tensor:
+        """
+        Args:
+            points: Points paddés (B, L, 2)
+            mask: Masque des points réels (B, L)
+            style_id: Indices de style (B,), 0 par défaut
+
+        Returns:
+            Points prédits (B, L, 2)
+        """
+        if style_id is None:
+            style_id = torch.zeros(points.shape[0], dtype=torch.long, device=points.device)
+
+        x = self.point_projection(points)
+        x = x + self._positional_encoding(points.shape[1]).to(x.dtype)
+        x = x + self.style_embedding(style_id).unsqueeze(1)
+        x = self.encoder(x, src_key_padding_mask=~mask)
+        return self.output_projection(x)
+
+    def masked_loss(self, prediction: torch.Tensor, target: torch.Tensor, mask: torch.Tensor) -> torch.Tensor:
+        """Erreur quadratique moyenne sur les seuls points réels"""
+        error = (prediction.float() - target.float()).pow(2).sum(dim=-1)
+        mask = mask.to(error.dtype)
+        return (error * mask).sum() / mask.sum().clamp(min=1.0)
+
+    def _step(self, batch: Dict[str, torch.Tensor], stage: str) -> torch.Tensor:
+        points, mask = batch['points'], batch['mask']
+        noisy = points + self.hparams.noise_std * torch.randn_like(points) * mask.unsqueeze(-1)
+        prediction = self(noisy, mask, batch.get('style_id'))
+        loss = self.masked_loss(prediction, points, mask)
+        self.log(f"{stage}_loss", loss, prog_bar=True, batch_size=points.shape[0])
+        return loss
+
+    def on_train_epoch_start(self) -> None:
+        # Lightning ne transmet l'époque qu'aux samplers élémentaires : les
+        # IterableDataset (GlyphDataset) et les batch samplers
+        # (LengthBucketBatchSampler) en ont besoin pour changer leur mélange
+        loader = self.trainer.train_dataloader
+        for source in (getattr(loader, 'dataset', None), getattr(loader, 'batch_sampler', None)):
+            if hasattr(source, 'set_epoch'):
+                source.set_epoch(self.current_epoch)
+
+    def _log_padding_efficiency(self, dataloader, stage: str) -> None:
+        """Efficacité du padding de l'époque, si les batches viennent d'un LengthBucketBatchSampler"""
+        epoch_stats = getattr(getattr(dataloader, 'batch_sampler', None), 'epoch_stats', None)
+        if epoch_stats:
+            self.log(f"{stage}_padding_efficiency", epoch_stats[-1]['padding_efficiency'])
+
+    def on_train_epoch_end(self) -> None:
+        self._log_padding_efficiency(self.trainer.train_dataloader, 'train')
+
+    def on_validation_epoch_end(self) -> None:
+        loaders = self.trainer.val_dataloaders
+        self._log_padding_efficiency(loaders[0] if isinstance(loaders, list) else loaders, 'val')
+
+    def training_step(self, batch: Dict[str, torch.Tensor], batch_idx: int) -> torch.Tensor:
+        return self._step(batch, 'train')
+
+    def validation_step(self, batch: Dict[str, torch.Tensor], batch_idx: int) -> torch.Tensor:
+        return self._step(batch, 'val')
+
+    def configure_optimizers(self):
+        return torch.optim.AdamW(self.parameters(), lr=self.hparams.learning_rate)
+
+
+def create_trainer(config_path: Path = Path('configs/model/default.yaml'), **overrides) -> L.Trainer:
+    """
+    Trainer configuré depuis la config : max_epochs, précision (bf16 mixte,
+    autocast compris sur CPU) et accumulation de gradients.
+    """
+    with open(config_path) as f:
+        config = yaml.safe_load(f)['model']
+
+    trainer_args: Dict[str, Any] = {
+        'max_epochs': config['max_epochs'],
+        'precision': config.get('precision', 'bf16-mixed'),
+        'accumulate_grad_batches': config.get('accumulate_grad_batches', 1),
+        'gradient_clip_val': config.get('gradient_clip_val'),
+    }
+    trainer_args.update(overrides)
+    return L.Trainer(**trainer_args)